@@ -0,0 +1,132 @@
+import numpy as np
+
+# Structure-of-arrays agent store shared by the Sugarscape models.
+# Each field is a typed array; rows [0, n) are in use. Dead rows are
+# dropped by compact(), which maybe_compact() runs every compact_every turns.
+
+COMPACT_EVERY = 10
+
+FIELDS = {
+    "id": np.int64,
+    "x": np.int32,
+    "y": np.int32,
+    "energy": np.int64,
+    "sight": np.int8,
+    "alive": np.bool_,
+    "uses_empowerment": np.bool_,
+}
+
+class Agent:
+    # Lightweight view over one row of an AgentStore.
+    # Only valid until the next compact().
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def _field(name):
+        def getter(self):
+            return getattr(self.store, name)[self.index].item()
+        def setter(self, value):
+            getattr(self.store, name)[self.index] = value
+        return property(getter, setter)
+
+    id = _field("id")
+    x = _field("x")
+    y = _field("y")
+    energy = _field("energy")
+    sight = _field("sight")
+    alive = _field("alive")
+    uses_empowerment = _field("uses_empowerment")
+    del _field
+
+class AgentStore:
+    def __init__(self, capacity=64, compact_every=COMPACT_EVERY):
+        self.n = 0
+        self.next_id = 0
+        self.compact_every = compact_every
+        for name, dtype in FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.n:
+            raise IndexError(index)
+        return Agent(self, index)
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield Agent(self, i)
+
+    def __getstate__(self):
+        # Pickle (e.g. checkpoints) only the rows in use
+        state = self.__dict__.copy()
+        for name in FIELDS:
+            state[name] = state[name][:self.n].copy()
+        return state
+
+    def _reserve(self, extra):
+        size = len(self.x)
+        if self.n + extra <= size:
+            return
+        size = max(size, 1)
+        while size < self.n + extra:
+            size *= 2
+        for name in FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def add(self, x, y, energy, sight, uses_empowerment=False):
+        self._reserve(1)
+        i = self.n
+        self.id[i] = self.next_id
+        self.x[i] = x
+        self.y[i] = y
+        self.energy[i] = energy
+        self.sight[i] = sight
+        self.alive[i] = True
+        self.uses_empowerment[i] = uses_empowerment
+        self.n += 1
+        self.next_id += 1
+        return i
+
+    def add_many(self, x, y, energy, sight, uses_empowerment=False):
+        # Append len(x) agents in one step; returns their row indices
+        k = len(x)
+        self._reserve(k)
+        rows = np.arange(self.n, self.n + k)
+        self.id[rows] = np.arange(self.next_id, self.next_id + k)
+        self.x[rows] = x
+        self.y[rows] = y
+        self.energy[rows] = energy
+        self.sight[rows] = sight
+        self.alive[rows] = True
+        self.uses_empowerment[rows] = uses_empowerment
+        self.n += k
+        self.next_id += k
+        return rows
+
+    def living(self):
+        return np.flatnonzero(self.alive[:self.n])
+
+    def num_alive(self):
+        return int(np.count_nonzero(self.alive[:self.n]))
+
+    def compact(self):
+        keep = self.alive[:self.n].copy()
+        k = int(np.count_nonzero(keep))
+        if k == self.n:
+            return
+        for name in FIELDS:
+            arr = getattr(self, name)
+            arr[:k] = arr[:self.n][keep]
+        self.n = k
+
+    def maybe_compact(self, turn):
+        if self.compact_every and turn % self.compact_every == 0:
+            self.compact()
@@ -0,0 +1,53 @@
+import os
+import warnings
+import numpy as np
+from telemetry import INDEX, open_run
+
+# Bulk loaders for run outputs. Telemetry directories (telemetry.py) are
+# memory-mapped; CSV files are parsed in one vectorized np.loadtxt pass.
+# Everything comes back as arrays ready for plotting, without per-row loops.
+
+def is_telemetry_dir(source):
+    return os.path.isdir(source) and os.path.exists(os.path.join(source, INDEX))
+
+def read_csv_columns(path):
+    # {header name: column array} for a numeric CSV with one header row
+    with open(path) as f:
+        names = f.readline().strip().split(",")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # header-only files
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    data = data.reshape(-1, len(names))
+    return {name: data[:, i] for i, name in enumerate(names)}
+
+def load_series(source):
+    # Per-turn metrics from a telemetry directory or a CSV file
+    if is_telemetry_dir(source):
+        run = open_run(source)
+        return {name: run.metrics[name] for name in run.dtype.names}
+    return read_csv_columns(source)
+
+def load_snapshots(source=None, sugar_csv=None, positions_csv=None):
+    # Returns (turns, sugar grids stacked as (S, n, n), {turn: (k, 2) positions})
+    if source is not None and is_telemetry_dir(source):
+        run = open_run(source)
+        turns = list(run.snapshot_turns)
+        return turns, run.sugar, {t: run.positions(t) for t in turns}
+
+    sugar = read_csv_columns(sugar_csv)
+    t_col = sugar["Turn"].astype(np.int64)
+    turns = np.unique(t_col)
+    xs = sugar["X"].astype(np.int64)
+    ys = sugar["Y"].astype(np.int64)
+    n = int(max(xs.max(), ys.max())) + 1 if len(xs) else 0
+    grids = np.zeros((len(turns), n, n))
+    grids[np.searchsorted(turns, t_col), xs, ys] = sugar["Sugar"]
+
+    pos = read_csv_columns(positions_csv)
+    p_turn = pos["Turn"].astype(np.int64)
+    xy = np.column_stack([pos["AgentX"], pos["AgentY"]]).astype(np.int64)
+    order = np.argsort(p_turn, kind="stable")
+    p_turn, xy = p_turn[order], xy[order]
+    bounds = np.searchsorted(p_turn, np.append(turns, turns[-1] + 1) if len(turns) else turns)
+    positions = {int(t): xy[bounds[k]:bounds[k+1]] for k, t in enumerate(turns)}
+    return turns.tolist(), grids, positions
@@ -0,0 +1,124 @@
+import numpy as np
+from grid import SugarGrid, EMPTY
+from sugarscape1 import GRID_SIZE, NUM_AGENTS, INITIAL_ENERGY, SIGHT, TURNS
+
+# Replicate-batched version of the Task 1 model (sugarscape1.Sugarscape).
+# K independent runs share one set of arrays with a leading replicate axis:
+# sugar and occupancy are (K, n, n), agent fields are (K, A). Regrowth,
+# harvesting, consumption and statistics are single array operations over
+# all replicates. Movement stays sequential within a replicate: step j moves
+# the j-th agent of every replicate's own shuffled order at once.
+# Each replicate draws from its own Generator, spawned from one SeedSequence.
+# Move orders and tie-break uniforms are drawn for a block of up to
+# BLOCK_TURNS turns (and about BLOCK_DRAWS values) at a time, so each
+# replicate's Generator is called once per block rather than every turn.
+
+BLOCK_TURNS = 50
+BLOCK_DRAWS = 1 << 20
+
+class BatchedSugarscape:
+    def __init__(self, replicates, seed=None, grid_size=GRID_SIZE, num_agents=NUM_AGENTS,
+                 initial_energy=INITIAL_ENERGY, sight=SIGHT):
+        self.replicates = replicates
+        self.grid_size = grid_size
+        self.num_agents = num_agents
+        self.rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(replicates)]
+        grid = SugarGrid(grid_size)
+        self.capacity = np.asarray(grid.capacity, dtype=np.int64)
+        self.sugar = np.repeat(self.capacity[None], replicates, axis=0)
+        self.occupancy = np.full((replicates, grid_size, grid_size), EMPTY, dtype=np.int64)
+
+        # Stencil of the largest sight; radius lets smaller sights mask it
+        max_sight = int(np.max(sight))
+        self.dx, self.dy = grid.stencil(max_sight)
+        self.radius = grid.stencil_radius(max_sight)
+        self.block_turns = max(1, min(BLOCK_TURNS, BLOCK_DRAWS // (replicates * num_agents)))
+        self._draws = None
+
+        self.rows = np.arange(replicates)
+        self.sight = np.broadcast_to(np.asarray(sight), (replicates, num_agents)).copy()
+        self.energy = np.full((replicates, num_agents), initial_energy, dtype=np.int64)
+        self.alive = np.ones((replicates, num_agents), dtype=bool)
+        self.place_agents()
+
+    def place_agents(self):
+        n = self.grid_size
+        cells = np.stack([rng.choice(n*n, self.num_agents, replace=False) for rng in self.rngs])
+        self.x, self.y = np.divmod(cells, n)
+        agent_ids = np.broadcast_to(np.arange(self.num_agents), cells.shape)
+        self.occupancy[self.rows[:, None], self.x, self.y] = agent_ids
+
+    def sugar_growth_phase(self):
+        self.sugar += 1
+        np.minimum(self.sugar, self.capacity, out=self.sugar)
+
+    def agent_movement_phase(self):
+        n = self.grid_size
+        rows = self.rows
+        order, ties_u = self.next_draws()
+        # flat views: cell (r, x, y) is r*n*n + x*n + y, agent (r, a) is r*A + a
+        occupancy, sugar = self.occupancy.reshape(-1), self.sugar.reshape(-1)
+        x, y, energy = self.x.reshape(-1), self.y.reshape(-1), self.energy.reshape(-1)
+        base = rows * (n * n)
+        agent = order + rows[:, None] * self.num_agents
+        # movers' state in move order; alive and sight don't change while moving
+        alive = np.take_along_axis(self.alive, order, axis=1)
+        in_sight = self.radius <= np.take_along_axis(self.sight, order, axis=1)[:, :, None]
+        for j in range(self.num_agents):
+            active = alive[:, j]
+            if not active.any():
+                continue
+            i = agent[:, j]
+            px, py = x[i], y[i]
+            cells = base[:, None] + ((px[:, None] + self.dx) % n) * n + (py[:, None] + self.dy) % n
+            ok = occupancy[cells] == EMPTY
+            ok[:, 0] = True
+            ok &= in_sight[:, j]
+            value = np.where(ok, sugar[cells], -1)
+            ties = value == value.max(axis=1, keepdims=True)
+            # k-th tied cell, k drawn uniformly from the replicate's own stream
+            k = (ties_u[:, j] * ties.sum(axis=1)).astype(np.int64)
+            pick = np.argmax(np.cumsum(ties, axis=1) > k[:, None], axis=1)
+
+            i, here, new = i[active], cells[active, 0], cells[rows[active], pick[active]]
+            occupancy[here] = EMPTY
+            occupancy[new] = order[active, j]
+            x[i], y[i] = np.divmod(new - base[active], n)
+            energy[i] += sugar[new]
+            sugar[new] = 0
+
+    def next_draws(self):
+        # This turn's (K, A) move orders and tie-break uniforms
+        if self._draws is None or self._turn == self.block_turns:
+            # per replicate and turn, A sort keys for the order then A tie uniforms,
+            # so a replicate's stream does not depend on the block length
+            u = np.stack([rng.random((self.block_turns, 2, self.num_agents)) for rng in self.rngs])
+            self._draws = (np.argsort(u[:, :, 0], axis=2), u[:, :, 1])
+            self._turn = 0
+        t = self._turn
+        self._turn += 1
+        return self._draws[0][:, t], self._draws[1][:, t]
+
+    def consumption_phase(self):
+        self.energy[self.alive] -= 1
+        died = self.alive & (self.energy <= 0)
+        r, a = np.nonzero(died)
+        self.occupancy[r, self.x[r, a], self.y[r, a]] = EMPTY
+        self.alive &= ~died
+
+    def total_energy(self):
+        return np.where(self.alive, self.energy, 0).sum(axis=1)
+
+    def run_simulation(self, turns=TURNS):
+        # Returns total living energy per turn and replicate, shape (turns, K)
+        energy = np.zeros((turns, self.replicates), dtype=np.int64)
+        for t in range(turns):
+            self.sugar_growth_phase()
+            self.agent_movement_phase()
+            self.consumption_phase()
+            energy[t] = self.total_energy()
+        return energy
+
+def confidence_band(series, q=(0.05, 0.5, 0.95)):
+    # Quantiles across replicates (axis 1) for every turn
+    return np.quantile(series, q, axis=1)
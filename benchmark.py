@@ -0,0 +1,236 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from revision import revision
+from simulation import MODELS, load_model
+
+# Benchmark suite for the three models. Each case runs in a fresh process
+# (so peak RSS is per case) with a fixed seed, times `turns` turns after one
+# warm-up turn, and records turns/sec, peak memory and the per-phase split
+# from profiling.Profiler. Results are JSON; `compare` diffs two result
+# files and exits non-zero when any case slows down beyond the threshold.
+#
+#     python benchmark.py run --preset quick --out bench_new.json
+#     python benchmark.py compare bench_old.json bench_new.json --threshold 0.1
+#
+# `movement` times the sequential movement phase alone against the original
+# object-and-tuple loop (ReferenceMovement) from the same start state.
+#
+#     python benchmark.py movement --case 500 20000 3 --turns 5
+
+# grid sizes x initial populations x sights x empowerment ratios
+PRESETS = {
+    "quick": {"grid_size": [20, 100], "num_agents": [20, 500], "sight": [2, 5], "empowerment_ratio": [0.5], "turns": 10},
+    "full": {"grid_size": [20, 200, 1000, 2000], "num_agents": [20, 1000, 20000], "sight": [2, 3, 5],
+             "empowerment_ratio": [0.0, 0.5, 1.0], "turns": 20},
+}
+
+# (grid size, agents, sight) for `movement`
+MOVEMENT_CASES = [(20, 20, 3), (100, 500, 3), (500, 20000, 3)]
+
+def cases(preset):
+    spec = PRESETS[preset]
+    for model, n, pop, sight in itertools.product(MODELS, spec["grid_size"], spec["num_agents"], spec["sight"]):
+        if pop > n * n // 2:
+            continue
+        ratios = spec["empowerment_ratio"] if model == "EmpoweredSugarscape" else [None]
+        for ratio in ratios:
+            params = {"grid_size": n, "num_agents": pop}
+            if model == "Sugarscape":
+                params["sight"] = sight
+            else:
+                params["sight_range"] = (sight, sight)
+            if ratio is not None:
+                params["empowerment_ratio"] = ratio
+            yield {"model": model, "params": params, "turns": spec["turns"]}
+
+def case_key(case):
+    return case["model"] + " " + " ".join(f"{k}={v}" for k, v in sorted(case["params"].items()))
+
+def run_case(case, seed=0):
+    from profiling import Profiler
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    _, cls = load_model(case["model"])
+    model = cls(rng=seed, **case["params"])
+    kwargs = {"write_csv": False, "out_dir": None}
+    model.run_simulation(turns=1, **kwargs)  # warm-up (stencils, caches)
+    profiler = Profiler()
+    start = time.perf_counter()
+    model.run_simulation(turns=1 + case["turns"], profiler=profiler, **kwargs)
+    elapsed = time.perf_counter() - start
+    phases = {p: sum(r[p] for r in profiler.rows) for p in ("growth", "movement", "empowerment", "consumption", "other")}
+    return {
+        "key": case_key(case),
+        "model": case["model"],
+        "params": case["params"],
+        "turns": case["turns"],
+        "seconds": elapsed,
+        "turns_per_sec": case["turns"] / elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+        "living_at_end": profiler.rows[-1]["living"],
+        "phases": phases,
+    }
+
+class ReferenceAgent:
+    def __init__(self, x, y, energy, sight):
+        self.x = x
+        self.y = y
+        self.energy = energy
+        self.sight = sight
+        self.alive = True
+
+class ReferenceMovement:
+    # The original movement phase, as it was before the grid and agents moved
+    # to arrays: Agent objects, per-agent lists of visible (x, y) tuples
+    # wrapped one by one and de-duplicated through set(), a set of occupied
+    # cells, then two scans for the best sugar and its ties
+    def __init__(self, sugar, agents, grid_size, rng):
+        self.sugar = sugar
+        self.agents = agents
+        self.grid_size = grid_size
+        self.rng = rng
+
+    def wrap(self, coord):
+        return coord % self.grid_size
+
+    def visible_locations(self, agent):
+        visible = [(agent.x, agent.y)]
+        for i in range(1, agent.sight+1):
+            visible.append((self.wrap(agent.x+i), agent.y))
+            visible.append((self.wrap(agent.x-i), agent.y))
+            visible.append((agent.x, self.wrap(agent.y+i)))
+            visible.append((agent.x, self.wrap(agent.y-i)))
+        return list(set(visible))
+
+    def agent_movement_phase(self):
+        self.rng.shuffle(self.agents)
+        occupied = {(a.x, a.y) for a in self.agents if a.alive}
+        for agent in self.agents:
+            if not agent.alive:
+                continue
+            candidates = [(lx, ly) for (lx, ly) in self.visible_locations(agent)
+                          if (lx, ly) not in occupied or (lx, ly) == (agent.x, agent.y)]
+            best_sugar = max(self.sugar[lx][ly] for (lx, ly) in candidates)
+            best_candidates = [(lx, ly) for (lx, ly) in candidates if self.sugar[lx][ly] == best_sugar]
+            new_x, new_y = self.rng.choice(best_candidates)
+            occupied.remove((agent.x, agent.y))
+            agent.x, agent.y = new_x, new_y
+            occupied.add((agent.x, agent.y))
+            agent.energy += self.sugar[new_x][new_y]
+            self.sugar[new_x][new_y] = 0
+
+def movement_case(grid_size, num_agents, sight, turns=5, seed=0):
+    # Seconds per movement phase for Sugarscape and for ReferenceMovement,
+    # both from the model's start state and regrown between phases (untimed)
+    import random
+    from sugarscape1 import Sugarscape
+    model = Sugarscape(grid_size=grid_size, num_agents=num_agents, sight=sight, rng=seed)
+    capacity = np.asarray(model.capacity)
+    living = model.agents.living()
+    agents = [ReferenceAgent(x, y, e, sight) for x, y, e in zip(model.agents.x[living].tolist(),
+              model.agents.y[living].tolist(), model.agents.energy[living].tolist())]
+    sugar = model.grid.snapshot()
+    reference = ReferenceMovement(None, agents, grid_size, random.Random(seed))
+    model_seconds = reference_seconds = 0.0
+    for _ in range(turns):
+        model.sugar_growth_phase()
+        start = time.perf_counter()
+        model.agent_movement_phase()
+        model_seconds += time.perf_counter() - start
+        sugar = np.minimum(sugar + 1, capacity)
+        reference.sugar = sugar.tolist()
+        start = time.perf_counter()
+        reference.agent_movement_phase()
+        reference_seconds += time.perf_counter() - start
+        sugar = np.array(reference.sugar, dtype=sugar.dtype)
+    return {
+        "key": f"movement grid_size={grid_size} num_agents={num_agents} sight={sight}",
+        "turns": turns,
+        "seconds_per_turn": model_seconds / turns,
+        "reference_seconds_per_turn": reference_seconds / turns,
+        "us_per_agent": 1e6 * model_seconds / (turns * num_agents),
+        "reference_us_per_agent": 1e6 * reference_seconds / (turns * num_agents),
+        "speedup": reference_seconds / model_seconds,
+    }
+
+def run_suite(preset="quick", out="benchmark.json", seed=0, only=None):
+    results = []
+    for case in cases(preset):
+        if only and only not in case_key(case):
+            continue
+        # one process per case so peak RSS is not shared between cases
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_case, case, seed).result()
+        print(f"{result['key']:<70} {result['turns_per_sec']:10.2f} turns/s {result['peak_rss_mb']:8.1f} MB", flush=True)
+        results.append(result)
+    report = {
+        "revision": revision(),
+        "preset": preset,
+        "seed": seed,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": results,
+    }
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1)
+    return report
+
+def compare(old_path, new_path, threshold=0.1):
+    # Returns (rows, regressions); a regression is a drop in turns/sec beyond threshold
+    with open(old_path) as f:
+        old = {c["key"]: c for c in json.load(f)["cases"]}
+    with open(new_path) as f:
+        new = {c["key"]: c for c in json.load(f)["cases"]}
+    rows, regressions = [], []
+    for key in sorted(old.keys() & new.keys()):
+        change = new[key]["turns_per_sec"] / old[key]["turns_per_sec"] - 1
+        rows.append((key, old[key]["turns_per_sec"], new[key]["turns_per_sec"], change))
+        if change < -threshold:
+            regressions.append(key)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sugarscape benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run")
+    run.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    run.add_argument("--out", default="benchmark.json")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--only", help="substring filter on case keys")
+    move = sub.add_parser("movement")
+    move.add_argument("--case", type=int, nargs=3, action="append", metavar=("GRID_SIZE", "AGENTS", "SIGHT"),
+                      help=f"default: {MOVEMENT_CASES}")
+    move.add_argument("--turns", type=int, default=5)
+    move.add_argument("--seed", type=int, default=0)
+    cmp = sub.add_parser("compare")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run_suite(args.preset, args.out, args.seed, args.only)
+        return 0
+    if args.command == "movement":
+        for case in args.case or MOVEMENT_CASES:
+            r = movement_case(*case, turns=args.turns, seed=args.seed)
+            print(f"{r['key']:<55} {r['us_per_agent']:8.2f} us/agent vs {r['reference_us_per_agent']:8.2f} "
+                  f"reference ({r['speedup']:.1f}x)", flush=True)
+        return 0
+    rows, regressions = compare(args.old, args.new, args.threshold)
+    for key, before, after, change in rows:
+        flag = "  REGRESSION" if key in regressions else ""
+        print(f"{key:<70} {before:10.2f} -> {after:10.2f} turns/s ({100*change:+6.1f}%){flag}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
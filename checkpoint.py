@@ -0,0 +1,67 @@
+import os
+import gzip
+import pickle
+from rng import BlockRNG
+
+# Checkpoints of a running model: grid arrays, agent store and the model's
+# own random stream (model.rng, see rng.py), pickled and gzip-compressed.
+# A model resumes from its own turn counter (model.grid.turn), so
+#     model = load_checkpoint(path); model.run_simulation(turns)
+# continues bit-for-bit where the checkpointed run left off.
+# fork_checkpoint() loads one copy per seed, each with a fresh stream,
+# giving branched continuations of one warm-up.
+
+CHECKPOINT_VERSION = 4
+
+def checkpoint_path(directory, turn):
+    return os.path.join(directory, f"turn_{turn:07d}.ckpt")
+
+def save_checkpoint(model, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "model": model,
+    }
+    # an attached profiler's method wrappers can't be pickled
+    profiler = model.__dict__.get("profiler")
+    if profiler is not None:
+        profiler.detach()
+    try:
+        with gzip.open(path + ".tmp", "wb", compresslevel=3) as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        if profiler is not None:
+            profiler.attach(model)
+    os.replace(path + ".tmp", path)
+    return path
+
+def maybe_checkpoint(model, turn, every, directory):
+    if every and turn % every == 0:
+        return save_checkpoint(model, checkpoint_path(directory, turn))
+    return None
+
+def load_checkpoint(path, reseed=None):
+    # reseed=None keeps the saved random stream; otherwise seeds a new one
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+    if state["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state['version']} in {path}")
+    model = state["model"]
+    if reseed is not None:
+        model.rng = BlockRNG(reseed, model.rng.block)
+    return model
+
+def fork_checkpoint(path, seeds):
+    # One branched continuation per seed; each copy owns its stream, and a
+    # lineage log on disk is copied to <dir>_seed<seed> so branches never
+    # append to the same files
+    for seed in seeds:
+        model = load_checkpoint(path, reseed=seed)
+        lineage = getattr(model, "lineage", None)
+        if lineage is not None and lineage.out_dir is not None:
+            model.lineage = lineage.fork(f"{lineage.out_dir.rstrip(os.sep)}_seed{seed}")
+        yield model
+
+def latest_checkpoint(directory):
+    names = sorted(n for n in os.listdir(directory) if n.endswith(".ckpt"))
+    return os.path.join(directory, names[-1]) if names else None
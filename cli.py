@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from revision import revision
+from metrics import parse as parse_metric
+from simulation import MODELS, load_model
+
+# One command-line entry point for all three models and engines.
+# Each seed is one run, written as a telemetry directory (telemetry.py)
+# under out_dir/seed_<seed>. out_dir/manifest.json records the model,
+# engine, parameters, seeds, snapshot cadence and workers, plus timings and
+# throughput per run. It is rewritten as each run finishes. Nothing imports
+# matplotlib unless --render is given, so headless batch jobs stay light.
+#
+#     python cli.py EvolSugarscape --seeds 1 2 3 --turns 500 --param num_agents=40 --out-dir runs/evol
+#     python cli.py EmpoweredSugarscape --param sight_range=[2,5] --stop takeover extinction --workers 4
+#     python cli.py Sugarscape --engine distributed --param grid_size=4000 --param num_agents=400000 --workers 8
+#
+# Engines: sequential and synchronous (the models' schedules, any model),
+# batched (batched.py, --replicates per seed) and distributed
+# (distributed.py, --workers processes per run), both Task 1 only.
+# --workers runs that many seeds at once on the other engines.
+
+ENGINES = ("sequential", "synchronous", "batched", "distributed")
+TASK1_ONLY = ("batched", "distributed")
+MANIFEST = "manifest.json"
+OUT_DIR = "runs"
+
+def parse_param(text):
+    # "name=value", value read as JSON when it parses (numbers, lists, ...) else a string
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected name=value, got {text!r}")
+    try:
+        return name, json.loads(value)
+    except json.JSONDecodeError:
+        return name, value
+
+def run_dir(out_dir, seed):
+    return os.path.join(out_dir, f"seed_{seed}")
+
+def run_model(job):
+    # sequential / synchronous: the model's own run_simulation
+    module, cls = load_model(job["model"])
+    metrics = dict(job["metrics"])
+    counts = [name for name, spec in {**module.METRICS, **metrics}.items() if spec == "count"]
+    if not counts:
+        metrics["Living"] = "count"  # for agent throughput
+    kwargs = {"turns": job["turns"], "out_dir": job["dir"], "write_csv": False,
+              "snapshot_every": job["snapshot_every"], "metrics": metrics}
+    if job["model"] == "Sugarscape":
+        kwargs["snapshot_turns"] = ()
+    if job["stop"]:
+        kwargs["stop"] = job["stop"]
+    if job["cache"] is not None:
+        from runcache import RunCache
+        kwargs["cache"] = RunCache(job["cache"])
+    if job["lineage"]:
+        kwargs["lineage"] = os.path.join(job["dir"], "lineage")
+
+    start = time.perf_counter()
+    model = cls(rng=job["seed"], schedule=job["engine"], **job["params"])
+    setup = time.perf_counter() - start
+    model.run_simulation(**kwargs)
+    seconds = time.perf_counter() - start - setup
+    # read back from the telemetry, which a cache hit copies in as well
+    from telemetry import open_run
+    run = open_run(job["dir"])
+    turns = model.stop_turn or len(run.metrics)
+    living = run.metrics[counts[0] if counts else "Living"][:turns]
+    return {"setup_seconds": setup, "run_seconds": seconds, "turns": turns, "agent_turns": int(living.sum()),
+            "cached": model.grid.turn == 0, "stop_reason": model.stop_reason, "stop_turn": model.stop_turn}
+
+def run_engine(job):
+    # batched / distributed: energy series only, written as telemetry
+    from telemetry import TelemetryWriter
+    start = time.perf_counter()
+    if job["engine"] == "batched":
+        from batched import BatchedSugarscape
+        model = BatchedSugarscape(job["replicates"], seed=job["seed"], **job["params"])
+        setup = time.perf_counter() - start
+        energy = model.run_simulation(turns=job["turns"])
+        columns = [f"TotalEnergy_{k}" for k in range(job["replicates"])]
+        rows = [(t + 1, *e) for t, e in enumerate(energy.tolist())]
+    else:
+        from distributed import DistributedSugarscape
+        with DistributedSugarscape(workers=job["workers"], rng=job["seed"], **job["params"]) as model:
+            setup = time.perf_counter() - start
+            rows = model.run_simulation(turns=job["turns"])
+        columns = ["TotalEnergy"]
+    seconds = time.perf_counter() - start - setup
+    with TelemetryWriter(job["dir"], [("Turn", np.int64)] + [(c, np.int64) for c in columns]) as telemetry:
+        for row in rows:
+            telemetry.record(row)
+    return {"setup_seconds": setup, "run_seconds": seconds, "turns": len(rows), "agent_turns": None,
+            "cached": False, "stop_reason": None, "stop_turn": None}
+
+def render_run(directory):
+    # Metric plots and snapshot frames into the run directory
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from telemetry import open_run
+    run = open_run(directory)
+    names = run.dtype.names[1:]
+    fig, axes = plt.subplots(len(names), 1, figsize=(8, 2.5 * len(names)), sharex=True, squeeze=False)
+    for ax, name in zip(axes[:, 0], names):
+        ax.plot(run.metrics["Turn"], run.metrics[name])
+        ax.set_ylabel(name)
+    axes[-1, 0].set_xlabel("Turn")
+    fig.tight_layout()
+    fig.savefig(os.path.join(directory, "metrics.png"))
+    plt.close(fig)
+    if run.snapshot_turns:
+        from render import render_animation
+        render_animation(directory, os.path.join(directory, "frames"), workers=1)
+
+def run_job(job):
+    os.makedirs(job["dir"], exist_ok=True)
+    record = run_model(job) if job["engine"] not in TASK1_ONLY else run_engine(job)
+    record["seed"] = job["seed"]
+    record["dir"] = job["dir"]
+    record["turns_per_sec"] = record["turns"] / record["run_seconds"] if record["run_seconds"] else None
+    if record["agent_turns"] is not None and record["run_seconds"]:
+        record["agent_turns_per_sec"] = record["agent_turns"] / record["run_seconds"]
+    if job["render"]:
+        start = time.perf_counter()
+        render_run(job["dir"])
+        record["render_seconds"] = time.perf_counter() - start
+    return record
+
+def write_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def run_batch(args, argv):
+    os.makedirs(args.out_dir, exist_ok=True)
+    params = dict(args.param)
+    jobs = [{"model": args.model, "engine": args.engine, "params": params, "seed": seed,
+             "dir": run_dir(args.out_dir, seed), "turns": args.turns, "snapshot_every": args.snapshot_every,
+             "metrics": dict(args.metric), "stop": args.stop, "cache": args.cache, "lineage": args.lineage,
+             "replicates": args.replicates, "workers": args.workers, "render": args.render}
+            for seed in args.seeds]
+    manifest = {
+        "command": [os.path.basename(sys.argv[0])] + list(argv if argv is not None else sys.argv[1:]),
+        "model": args.model,
+        "engine": args.engine,
+        "params": params,
+        "seeds": args.seeds,
+        "turns": args.turns,
+        "out_dir": args.out_dir,
+        "snapshot_every": args.snapshot_every,
+        "workers": args.workers,
+        "revision": revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": [],
+    }
+    write_manifest(args.out_dir, manifest)
+    start = time.perf_counter()
+    # distributed runs use the workers themselves; the others run seeds side by side
+    parallel = args.workers if args.engine != "distributed" else 1
+    if parallel > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=parallel) as pool:
+            futures = [pool.submit(run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                manifest["runs"].append(future.result())
+                write_manifest(args.out_dir, manifest)
+    else:
+        for job in jobs:
+            manifest["runs"].append(run_job(job))
+            write_manifest(args.out_dir, manifest)
+    manifest["runs"].sort(key=lambda r: args.seeds.index(r["seed"]))
+    manifest["seconds"] = time.perf_counter() - start
+    write_manifest(args.out_dir, manifest)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Sugarscape models headless and write a run manifest")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("--engine", choices=ENGINES, default="sequential")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=VALUE",
+                        help="constructor argument, e.g. num_agents=40 or sight_range=[2,5]")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--snapshot-every", type=int, help="grid snapshot cadence in turns (none by default)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--replicates", type=int, default=1, help="replicates per seed (batched engine)")
+    parser.add_argument("--metric", type=parse_param, action="append", default=[], metavar="NAME=SPEC",
+                        help="extra per-turn column, e.g. SightP=quantiles:sight (see metrics.py)")
+    parser.add_argument("--stop", nargs="+", default=[], help="termination detectors, e.g. extinction takeover steady_state")
+    parser.add_argument("--cache", nargs="?", const=".sugarscape_cache", help="read back / store runs in a run cache")
+    parser.add_argument("--lineage", action="store_true", help="log births and deaths (EvolSugarscape, EmpoweredSugarscape)")
+    parser.add_argument("--render", action="store_true", help="plot metrics and snapshot frames into each run directory")
+    args = parser.parse_args(argv)
+
+    if args.engine in TASK1_ONLY and args.model != "Sugarscape":
+        parser.error(f"the {args.engine} engine only runs Sugarscape")
+    if args.engine in TASK1_ONLY and (args.stop or args.lineage or args.metric or args.cache or args.snapshot_every):
+        parser.error(f"the {args.engine} engine records total energy only (no --stop, --lineage, --metric, --cache or snapshots)")
+    if args.lineage and args.model == "Sugarscape":
+        parser.error("Sugarscape has no births to log")
+    for name, spec in args.metric:
+        try:
+            parse_metric(spec)
+        except ValueError as e:
+            parser.error(f"--metric {name}: {e}")
+
+    manifest = run_batch(args, argv)
+    for run in manifest["runs"]:
+        reason = f" (stopped: {run['stop_reason']} at turn {run['stop_turn']})" if run["stop_reason"] else ""
+        print(f"seed {run['seed']}: {run['turns']} turns in {run['run_seconds']:.2f}s{reason} -> {run['dir']}")
+    print(f"Manifest written to {os.path.join(args.out_dir, MANIFEST)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from grid import SugarGrid, EMPTY
+from agents import AgentStore, FIELDS
+from landscape import FunctionLandscape
+from rng import as_rng
+from sequential import sequential_movement
+from sugarscape1 import GRID_SIZE, NUM_AGENTS, INITIAL_ENERGY, SIGHT, TURNS
+
+# Domain-decomposed Task 1 model (sugarscape1.Sugarscape) for large grids.
+# The torus is cut into strips of whole rows (x ranges), one per worker
+# process. Sugar and occupancy live in shared memory, so every worker sees
+# its neighbours' boundary rows (the halo, `sight` rows deep) without
+# copying. Each strip is split into an A half and a B half, each at least
+# 2 * sight rows wide, and movement runs in two sub-steps: all A halves at
+# once, then all B halves. Cells read or written by agents of one half
+# never overlap those of another worker's same half, so the sub-steps need
+# no locks, only a barrier. Agents move in a random order within their
+# half, exactly as in the sequential model.
+# After consumption, agents that ended up outside their worker's strip are
+# handed to the owner of their new row, arriving before the next turn.
+#
+#     with DistributedSugarscape(grid_size=4000, num_agents=400000, workers=8, rng=1) as model:
+#         energy = model.run_simulation(turns=100)
+
+def strips(grid_size, workers, sight):
+    # Row bounds of the strips; fewer workers if a half strip would be narrower than 2 * sight
+    workers = max(1, min(workers, grid_size // (4 * sight)))
+    return np.linspace(0, grid_size, workers + 1).astype(int).tolist()
+
+class _Strip:
+    # One worker's share of the model: rows [x0, x1) and the agents on them
+    def __init__(self, grid_size, landscape, bounds, names, dtype, rng):
+        self.x0, self.x1 = bounds
+        self.mid = self.x0 + (self.x1 - self.x0) // 2
+        # the blocks are registered with the parent's resource tracker, which unlinks them
+        self._shm = [shared_memory.SharedMemory(name=name) for name in names]
+        shape = (grid_size, grid_size)
+        sugar = np.ndarray(shape, dtype=dtype, buffer=self._shm[0].buf)
+        occupancy = np.ndarray(shape, dtype=np.int32, buffer=self._shm[1].buf)
+        self.grid = SugarGrid(grid_size, landscape=landscape, buffers=(sugar, occupancy))
+        self.agents = AgentStore()
+        self.rng = rng
+        self.moved = np.zeros(0, dtype=bool)
+
+    def adopt(self, arrivals):
+        # arrivals: {field: array}; agents keep their ids
+        if arrivals is not None and len(arrivals["id"]):
+            rows = self.agents.add_many(arrivals["x"], arrivals["y"], arrivals["energy"], arrivals["sight"])
+            self.agents.id[rows] = arrivals["id"]
+
+    def grow(self, arrivals):
+        self.adopt(arrivals)
+        sugar = self.grid.sugar[self.x0:self.x1]
+        sugar += 1
+        np.minimum(sugar, self.grid.capacity.band(self.x0, self.x1), out=sugar)
+
+    def move(self, half):
+        lo, hi = (self.x0, self.mid) if half == 0 else (self.mid, self.x1)
+        agents = self.agents
+        n = agents.n
+        if half == 0:
+            self.moved = np.zeros(n, dtype=bool)
+        x = agents.x[:n]
+        idx = np.flatnonzero(agents.alive[:n] & ~self.moved & (x >= lo) & (x < hi))
+        self.moved[idx] = True
+        sequential_movement(self, movers=idx)
+
+    def consume(self, _):
+        # Returns (leavers, total energy, living) after deaths and hand-off
+        agents = self.agents
+        living = agents.living()
+        agents.energy[living] -= 1
+        agents.alive[living] = agents.energy[living] > 0
+        dead = living[~agents.alive[living]]
+        self.grid.vacate(agents.x[dead], agents.y[dead])
+        living = agents.living()
+        total_energy = int(agents.energy[living].sum())
+        x = agents.x[living]
+        leaving = living[(x < self.x0) | (x >= self.x1)]
+        leavers = {name: getattr(agents, name)[leaving].copy() for name in ("id", "x", "y", "energy", "sight")}
+        agents.alive[leaving] = False
+        agents.compact()
+        return leavers, total_energy, len(living)
+
+    def positions(self, _):
+        living = self.agents.living()
+        return np.column_stack([self.agents.x[living], self.agents.y[living]])
+
+    def close(self):
+        del self.grid
+        for shm in self._shm:
+            shm.close()
+
+def _serve(conn, spec):
+    strip = None
+    try:
+        strip = _Strip(**spec)
+        conn.send(("ok", None))
+        while True:
+            command, arg = conn.recv()
+            if command == "stop":
+                break
+            conn.send(("ok", getattr(strip, command)(arg)))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        if strip is not None:
+            strip.close()
+
+class DistributedSugarscape:
+    def __init__(self, grid_size=GRID_SIZE, num_agents=NUM_AGENTS, initial_energy=INITIAL_ENERGY, sight=SIGHT,
+                 workers=None, landscape=None, rng=None):
+        self.grid_size = grid_size
+        self.num_agents = num_agents
+        self.turn = 0
+        self.rng = as_rng(rng)
+        if landscape is None:
+            landscape = FunctionLandscape(grid_size)
+        self.bounds = strips(grid_size, workers or mp.cpu_count(), sight)
+        self.workers = len(self.bounds) - 1
+
+        n = grid_size
+        dtype = landscape.dtype
+        self._shm = [shared_memory.SharedMemory(create=True, size=n * n * np.dtype(dtype).itemsize),
+                     shared_memory.SharedMemory(create=True, size=n * n * 4)]
+        self.sugar = np.ndarray((n, n), dtype=dtype, buffer=self._shm[0].buf)
+        self.occupancy = np.ndarray((n, n), dtype=np.int32, buffer=self._shm[1].buf)
+        for x0, x1, cap in landscape.tiles():
+            self.sugar[x0:x1] = cap
+        self.occupancy[:] = EMPTY
+
+        # Random distinct cells, as in Sugarscape.place_agents
+        cells = self.rng.generator.choice(n * n, num_agents, replace=False)
+        x, y = np.divmod(cells, n)
+        ids = np.arange(num_agents)
+        self.occupancy[x, y] = ids
+        agents = {"id": ids, "x": x, "y": y, "energy": np.full(num_agents, initial_energy), "sight": np.full(num_agents, sight)}
+        self._arrivals = self._route(agents)
+
+        ctx = mp.get_context()
+        self._conns, self._procs = [], []
+        for k, stream in enumerate(self.rng.spawn(self.workers)):
+            spec = {"grid_size": n, "landscape": landscape, "bounds": self.bounds[k:k+2],
+                    "names": [shm.name for shm in self._shm], "dtype": dtype, "rng": stream}
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_serve, args=(child, spec), daemon=True)
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self._gather()
+
+    def _route(self, agents):
+        # Split {field: array} by the strip that owns each agent's row
+        owner = np.searchsorted(self.bounds, agents["x"], side="right") - 1
+        return [{name: np.asarray(values[owner == k], dtype=FIELDS[name]) for name, values in agents.items()}
+                for k in range(self.workers)]
+
+    def _gather(self):
+        results = []
+        for conn in self._conns:
+            status, value = conn.recv()
+            if status == "error":
+                self.close()
+                raise RuntimeError("Worker failed:\n" + value)
+            results.append(value)
+        return results
+
+    def _call(self, command, args=None):
+        # Runs command on every worker and waits for all of them (a barrier)
+        for k, conn in enumerate(self._conns):
+            conn.send((command, args[k] if args is not None else None))
+        return self._gather()
+
+    def step(self):
+        self.turn += 1
+        self._call("grow", self._arrivals)
+        self._call("move", [0] * self.workers)
+        self._call("move", [1] * self.workers)
+        results = self._call("consume")
+        leavers = {name: np.concatenate([r[0][name] for r in results]) for name in results[0][0]}
+        self._arrivals = self._route(leavers)
+        return sum(r[1] for r in results), sum(r[2] for r in results)
+
+    def run_simulation(self, turns=TURNS):
+        # Total energy of living agents per turn, as Sugarscape.run_simulation
+        energy_data = []
+        for t in range(self.turn + 1, turns + 1):
+            total_energy, _ = self.step()
+            energy_data.append((t, total_energy))
+        return energy_data
+
+    def positions(self):
+        # (k, 2) positions of the living agents (hand-offs included)
+        pending = [np.column_stack([a["x"], a["y"]]) for a in self._arrivals]
+        return np.concatenate(self._call("positions") + pending)
+
+    def snapshot(self):
+        return self.sugar.copy()
+
+    def close(self):
+        for conn, proc in zip(self._conns, self._procs):
+            if proc.is_alive():
+                conn.send(("stop", None))
+            proc.join()
+        self._conns, self._procs = [], []
+        if self._shm:
+            del self.sugar, self.occupancy
+            for shm in self._shm:
+                shm.close()
+                shm.unlink()
+            self._shm = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,89 @@
+import numpy as np
+from grid import EMPTY
+
+# Multi-step empowerment: the number of distinct cells an agent could reach
+# in up to `horizon` moves, where each move goes to a free cell in the
+# radius-sight cross of its current cell (the start cell always counts).
+# The mover's own cell (vacated) counts as free, as in the one-step
+# SugarGrid.empowerment, so horizon=1 gives the same counts.
+#
+# Reachable sets are boolean dilations over a window of the free grid,
+# read from the grid's live occupancy at query time. All start cells of one
+# query are dilated together as a stack of windows (in batches of at most
+# BATCH_CELLS window cells), and repeated (start, vacated) pairs within a
+# query are computed once. Results are not kept between queries: every
+# candidate window of a mover contains its own cell, so they depend on
+# who is moving and on every earlier move.
+
+BATCH_CELLS = 1 << 22
+
+class Reach:
+    def __init__(self, grid, horizon):
+        self.grid = grid
+        self.grid_size = grid.grid_size
+        self.horizon = horizon
+
+    def counts(self, xs, ys, sight, vacated=None):
+        # vacated: (x, y) scalars or arrays like xs, a cell counted as free
+        shape = np.shape(xs)
+        xs = np.asarray(xs, dtype=np.int64).ravel()
+        ys = np.asarray(ys, dtype=np.int64).ravel()
+        if vacated is None:
+            vx = vy = np.full(len(xs), -1)
+        else:
+            vx = np.broadcast_to(np.asarray(vacated[0], dtype=np.int64), shape).ravel()
+            vy = np.broadcast_to(np.asarray(vacated[1], dtype=np.int64), shape).ravel()
+        # one int64 key per (start, vacated) pair; vacated -1 (none) maps to 0
+        n = self.grid_size
+        code = ((xs * n + ys) * (n + 1) + vx + 1) * (n + 1) + vy + 1
+        code, first, inverse = np.unique(code, return_index=True, return_inverse=True)
+        xs, ys, vx, vy = xs[first], ys[first], vx[first], vy[first]
+        radius = self.horizon * sight
+        width = min(n, 2*radius + 1)
+        step = max(1, BATCH_CELLS // (width * width))
+        out = np.empty(len(code), dtype=np.int64)
+        for k in range(0, len(code), step):
+            out[k:k+step] = self._compute(xs[k:k+step], ys[k:k+step], vx[k:k+step], vy[k:k+step], sight)
+        return out[inverse.ravel()]
+
+    def _compute(self, xs, ys, vx, vy, sight):
+        n = self.grid_size
+        radius = self.horizon * sight
+        wrap = 2*radius + 1 > n
+        # Window around each start cell; the start sits at (centre, centre).
+        # Small worlds use the whole torus and wrap the dilation instead.
+        width = n if wrap else 2*radius + 1
+        centre = n // 2 if wrap else radius
+        span = np.arange(width) - centre
+        wx = (xs[:, None] + span) % n
+        wy = (ys[:, None] + span) % n
+        free = self.grid.occupancy[wx[:, :, None], wy[:, None, :]] == EMPTY
+        free |= (wx == vx[:, None])[:, :, None] & (wy == vy[:, None])[:, None, :]
+        reach = np.zeros_like(free)
+        reach[:, centre, centre] = True
+        for _ in range(self.horizon):
+            grown = _dilate(reach, sight, wrap) & free
+            grown |= reach
+            if np.array_equal(grown, reach):
+                break
+            reach = grown
+        return reach.sum(axis=(1, 2))
+
+def _dilate(mask, sight, wrap):
+    # Cross-shaped dilation of a stack of 2D masks (axes 1 and 2)
+    out = mask.copy()
+    if wrap:
+        n = mask.shape[1]
+        for d in np.unique(np.arange(1, sight+1) % n):
+            if d == 0:
+                continue
+            for axis in (1, 2):
+                out |= np.roll(mask, d, axis=axis)
+                out |= np.roll(mask, -d, axis=axis)
+        return out
+    for d in range(1, sight+1):
+        out[:, d:, :] |= mask[:, :-d, :]
+        out[:, :-d, :] |= mask[:, d:, :]
+        out[:, :, d:] |= mask[:, :, :-d]
+        out[:, :, :-d] |= mask[:, :, d:]
+    return out
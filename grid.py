@@ -0,0 +1,283 @@
+import numpy as np
+from landscape import FunctionLandscape
+
+# Shared grid core for the Sugarscape models.
+# capacity is a landscape (see landscape.py; x + y by default) indexed
+# [x, y] like sugar, a 2D array of the landscape's smallest adequate dtype.
+# occupancy holds the id of the agent standing on each cell, or -1 when
+# the cell is free.
+#
+# With track_sights, the grid also keeps, for each tracked sight s,
+# row_free[k, x, y]: free cells (x, y+d) and col_free[k, x, y]: free cells
+# (x+d, y) over the offsets d of the radius-s cross (k = slot of s). They
+# are updated on every place/vacate/move, so empowerment() is a lookup.
+#
+# With lazy=True there is no sugar array. Each cell keeps the turn it was
+# last harvested and the value left then, and sugar_at() works out
+# min(capacity, value + turns since), so grow() costs nothing per cell.
+#
+# Per-agent moves (sequential.py) work on flat cell indices x * n + y
+# between begin_moves() and end_moves(): candidates() and move_and_harvest()
+# are plain Python over a dozen cells, reading and writing memoryviews of the
+# occupancy and sugar arrays.
+
+EMPTY = -1
+
+class SugarGrid:
+    def __init__(self, grid_size, track_sights=(), lazy=False, landscape=None, buffers=None):
+        # buffers: existing (sugar, occupancy) arrays to work on in place of
+        # fresh ones, e.g. views of shared memory (see distributed.py)
+        self.grid_size = grid_size
+        if landscape is None:
+            landscape = FunctionLandscape(grid_size)
+        if landscape.grid_size != grid_size:
+            raise ValueError(f"Landscape is {landscape.grid_size}x{landscape.grid_size}, grid is {grid_size}x{grid_size}")
+        self.capacity = landscape
+        self.lazy = lazy
+        self.turn = 0
+        if buffers is not None:
+            if lazy:
+                raise ValueError("Shared buffers need eager regrowth (lazy=False)")
+            self.sugar, self.occupancy = buffers
+        else:
+            if lazy:
+                self.value = landscape.materialize()
+                self.last = np.zeros((grid_size, grid_size), dtype=np.int32)
+            else:
+                self.sugar = landscape.materialize()
+            self.occupancy = np.full((grid_size, grid_size), EMPTY, dtype=np.int32)
+        self._stencils = {}
+        self._radii = {}
+        self._arms = {}
+        self._moves = self._free = None
+        self._track_free(track_sights)
+
+    def _track_free(self, sights):
+        n = self.grid_size
+        self.sight_slot = {s: k for k, s in enumerate(sights)}
+        # in_reach[s][d]: offset d (mod n) lies on one arm of the radius-s cross
+        self.in_reach = {}
+        slots, offsets = [], []
+        for s, k in self.sight_slot.items():
+            dx, dy = self.stencil(s)
+            d = np.unique(dy[dx == 0])
+            reach = np.zeros(n, dtype=bool)
+            reach[d] = True
+            self.in_reach[s] = reach
+            slots.append(np.full(len(d), k))
+            offsets.append(d)
+        # a window holds at most 2 * sight + 1 <= 255 cells (sight is int8)
+        self.row_free = np.zeros((len(sights), n, n), dtype=np.uint8)
+        self.col_free = np.zeros((len(sights), n, n), dtype=np.uint8)
+        if sights:
+            slots = np.concatenate(slots)
+            offsets = np.concatenate(offsets)
+            counts = np.bincount(slots, minlength=len(sights)).astype(np.uint8)
+            self.row_free += counts[:, None, None]
+            self.col_free += counts[:, None, None]
+            # flat indices of the windows covering a cell: row_free at
+            # x * n + row_window[y], col_free at col_window[x] + y
+            wrapped = (np.arange(n)[:, None] - offsets) % n
+            self._row_window = slots * (n * n) + wrapped
+            self._col_window = slots * (n * n) + wrapped * n
+
+    def _update_free(self, x, y, delta):
+        # Every window whose cross arm covers (x, y) gains (delta = 1) or
+        # loses (delta = -1) a free cell
+        if not self.sight_slot:
+            return
+        n = self.grid_size
+        row_free = self.row_free.reshape(-1)
+        col_free = self.col_free.reshape(-1)
+        if np.ndim(x) == 0:
+            # one cell's windows are distinct; unsigned counts, so no += -1
+            rows = x * n + self._row_window[y]
+            cols = self._col_window[x] + y
+            if delta > 0:
+                row_free[rows] += 1
+                col_free[cols] += 1
+            else:
+                row_free[rows] -= 1
+                col_free[cols] -= 1
+        else:
+            x = np.asarray(x, dtype=np.int64)
+            y = np.asarray(y, dtype=np.int64)
+            update = np.add.at if delta > 0 else np.subtract.at
+            update(row_free, x[:, None] * n + self._row_window[y], 1)
+            update(col_free, self._col_window[x] + y[:, None], 1)
+
+    def wrap(self, coord):
+        return coord % self.grid_size
+
+    def stencil(self, sight):
+        # Wrapped, de-duplicated (dx, dy) offsets of the cross of radius sight.
+        # Index 0 is always the centre cell.
+        if sight not in self._stencils:
+            n = self.grid_size
+            radius = {(0, 0): 0}
+            for i in range(1, sight+1):
+                for o in [(i % n, 0), (-i % n, 0), (0, i % n), (0, -i % n)]:
+                    radius.setdefault(o, i)
+            dx = np.array([o[0] for o in radius], dtype=np.int64)
+            dy = np.array([o[1] for o in radius], dtype=np.int64)
+            self._stencils[sight] = (dx, dy)
+            self._radii[sight] = np.array(list(radius.values()), dtype=np.int64)
+        return self._stencils[sight]
+
+    def stencil_radius(self, sight):
+        # Distance from the centre of each stencil offset, so the stencil of
+        # a larger sight can be masked down to a smaller one
+        self.stencil(sight)
+        return self._radii[sight]
+
+    def visible(self, x, y, sight):
+        dx, dy = self.stencil(sight)
+        n = self.grid_size
+        return (x + dx) % n, (y + dy) % n
+
+    def arms(self, sight):
+        # Python tables of the radius-sight cross for per-agent moves:
+        # near[c] lists (c + d) % n over its distinct nonzero arm offsets d,
+        # near_n[c] the same times n
+        if sight not in self._arms:
+            n = self.grid_size
+            dx, dy = self.stencil(sight)
+            near = (np.arange(n)[:, None] + dy[(dx == 0) & (dy != 0)]) % n
+            self._arms[sight] = (near.tolist(), (near * n).tolist())
+        return self._arms[sight]
+
+    def begin_moves(self):
+        sugar = None if self.lazy else memoryview(self.sugar.reshape(-1))
+        self._moves = (memoryview(self.occupancy.reshape(-1)), sugar)
+        self._free = (memoryview(self.row_free.reshape(-1)), memoryview(self.col_free.reshape(-1)))
+
+    def end_moves(self):
+        self._moves = self._free = None
+
+    def candidates(self, x, y, sight):
+        # Visible cells that are free, plus the agent's own cell (first), as
+        # flat indices, and their sugar; between begin_moves() and end_moves()
+        near, near_n = self._arms.get(sight) or self.arms(sight)
+        xn = x * self.grid_size
+        cells = [xn + v for v in near[y]]
+        cells += [u + y for u in near_n[x]]
+        occupancy, sugar = self._moves
+        cells = [xn + y] + [c for c in cells if occupancy[c] == EMPTY]
+        if sugar is not None:
+            return cells, [sugar[c] for c in cells]
+        return cells, self.sugar_at(*np.divmod(np.array(cells), self.grid_size)).tolist()
+
+    def move_and_harvest(self, c0, c1):
+        # The agent on flat cell c0 moves to c1 and takes all its sugar, which
+        # is returned; between begin_moves() and end_moves()
+        occupancy, sugar = self._moves
+        n = self.grid_size
+        if c1 != c0:
+            occupancy[c1] = occupancy[c0]
+            occupancy[c0] = EMPTY
+            if self.sight_slot:
+                self._update_free(*divmod(c0, n), 1)
+                self._update_free(*divmod(c1, n), -1)
+        if sugar is not None:
+            amount = sugar[c1]
+            sugar[c1] = 0
+            return amount
+        return self.harvest(*divmod(c1, n))
+
+    def empowerment(self, x, y, sight, vacated=None):
+        # Distinct free cells in the radius-sight cross around (x, y), with
+        # (x, y) itself and the vacated cell counted as free. Elementwise on arrays.
+        x = np.asarray(x)
+        y = np.asarray(y)
+        free_here = self.occupancy[x, y] == EMPTY
+        if sight in self.sight_slot:
+            k = self.sight_slot[sight]
+            emp = self.row_free[k, x, y].astype(np.int64) + self.col_free[k, x, y] - 2 * free_here + 1
+        else:
+            xs, ys = self.visible(x[..., None], y[..., None], sight)
+            free = self.occupancy[xs, ys] == EMPTY
+            emp = free.sum(axis=-1) - free_here + 1
+        if vacated is not None:
+            vx, vy = vacated
+            n = self.grid_size
+            reach = self.in_reach.get(sight)
+            if reach is None:
+                reach = np.zeros(n, dtype=bool)
+                reach[np.unique(self.stencil(sight)[1])] = True
+            covers = ((x == vx) & reach[(vy - y) % n]) | ((y == vy) & reach[(vx - x) % n])
+            covers &= (x != vx) | (y != vy)
+            emp = emp + (covers & (self.occupancy[vx, vy] != EMPTY))
+        return emp
+
+    def candidate_empowerment(self, cells, sight, here):
+        # empowerment() of a mover's candidates (flat cells, see candidates())
+        # with the mover's own cell `here` vacated; elementwise, `here` may be
+        # an array like cells. The other candidates are free and on the
+        # mover's cross, so the mover's cell is on theirs, and the lookup is
+        # the row plus column count (+1 for staying put). A list of cells
+        # (one mover, between begin_moves() and end_moves()) gives a list.
+        k = self.sight_slot.get(sight)
+        if k is not None and isinstance(cells, list):
+            row_free, col_free = self._free
+            base = k * self.grid_size * self.grid_size
+            return [row_free[base + c] + col_free[base + c] + (c == here) for c in cells]
+        if k is None:
+            x, y = np.divmod(np.asarray(cells), self.grid_size)
+            emp = self.empowerment(x, y, sight, vacated=np.divmod(here, self.grid_size))
+            return emp.tolist() if isinstance(cells, list) else emp
+        cells = np.asarray(cells)
+        emp = self.row_free[k].reshape(-1).take(cells).astype(np.int64)
+        emp += self.col_free[k].reshape(-1).take(cells)
+        emp += cells == here
+        return emp
+
+    def grow(self):
+        self.turn += 1
+        if self.lazy:
+            return
+        # +1 per turn, capped at capacity (sugar never exceeds capacity)
+        self.sugar += 1
+        for x0, x1, cap in self.capacity.tiles():
+            np.minimum(self.sugar[x0:x1], cap, out=self.sugar[x0:x1])
+
+    def sugar_at(self, x, y):
+        if self.lazy:
+            return np.minimum(self.capacity[x, y], self.value[x, y] + (self.turn - self.last[x, y]))
+        return self.sugar[x, y]
+
+    def harvest(self, x, y):
+        # Takes all sugar from (x, y); index arrays must name distinct cells
+        amount = self.sugar_at(x, y)
+        if self.lazy:
+            self.value[x, y] = 0
+            self.last[x, y] = self.turn
+        else:
+            self.sugar[x, y] = 0
+        return int(amount) if np.ndim(amount) == 0 else amount
+
+    # place/vacate accept scalars or index arrays
+    def place(self, x, y, agent_id):
+        self.occupancy[x, y] = agent_id
+        self._update_free(x, y, -1)
+
+    def vacate(self, x, y):
+        self.occupancy[x, y] = EMPTY
+        self._update_free(x, y, 1)
+
+    def move(self, x0, y0, x1, y1):
+        if (x0, y0) == (x1, y1):
+            return
+        agent_id = self.occupancy[x0, y0]
+        self.vacate(x0, y0)
+        self.place(x1, y1, agent_id)
+
+    def is_free(self, x, y):
+        return self.occupancy[x, y] == EMPTY
+
+    def snapshot(self):
+        if self.lazy:
+            out = np.empty_like(self.value)
+            for x0, x1, cap in self.capacity.tiles():
+                np.minimum(cap, self.value[x0:x1] + (self.turn - self.last[x0:x1]), out=out[x0:x1], casting="unsafe")
+            return out
+        return self.sugar.copy()
@@ -0,0 +1,191 @@
+import os
+import numpy as np
+
+# Sugar capacity landscapes for SugarGrid.
+# A landscape knows its size and its largest capacity, and serves capacity
+# either elementwise (landscape[x, y], for the cells agents look at) or in
+# bands of whole rows (tiles(), for regrowth and snapshots), so the full
+# capacity grid never has to exist in memory:
+#
+#   FunctionLandscape  capacity = func(x, y, grid_size), evaluated on demand
+#                      (diagonal, the original x + y, is the default)
+#   TwoPeakLandscape   the classic two-hill Sugarscape, optionally repeated
+#                      as a periodic tiling for very large grids
+#   ArrayLandscape     an in-memory array, or a .npy file opened as a
+#                      read-only memmap (MemmapLandscape / save_landscape)
+#
+# dtype is the smallest unsigned integer that holds max_value + 1, so sugar
+# can regrow by one before it is capped without overflowing.
+
+TILE_CELLS = 1 << 22  # cells per band of rows
+
+def sugar_dtype(max_value):
+    return np.min_scalar_type(int(max_value) + 1)
+
+def diagonal(x, y, grid_size):
+    return x + y
+
+class Landscape:
+    # Subclasses set grid_size and max_value and define band(x0, x1)
+    @property
+    def shape(self):
+        return (self.grid_size, self.grid_size)
+
+    @property
+    def dtype(self):
+        return sugar_dtype(self.max_value)
+
+    def rows_per_tile(self):
+        return max(1, TILE_CELLS // self.grid_size)
+
+    def tiles(self):
+        # (x0, x1, capacity[x0:x1]) over bands of whole rows
+        step = self.rows_per_tile()
+        for x0 in range(0, self.grid_size, step):
+            x1 = min(x0 + step, self.grid_size)
+            yield x0, x1, self.band(x0, x1)
+
+    def materialize(self, dtype=None):
+        out = np.empty(self.shape, dtype=dtype or self.dtype)
+        for x0, x1, cap in self.tiles():
+            out[x0:x1] = cap
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        return self.materialize(dtype)
+
+class FunctionLandscape(Landscape):
+    # func(x, y, grid_size) must be vectorised and return integers >= 0.
+    # Grids of up to TILE_CELLS cells are evaluated once and kept.
+    def __init__(self, grid_size, func=diagonal, max_value=None):
+        self.grid_size = grid_size
+        self.func = func
+        self._cache = None
+        if max_value is None:
+            step = self.rows_per_tile()
+            max_value = max(int(self._evaluate_band(x0, x0 + step).max()) for x0 in range(0, grid_size, step))
+        self.max_value = max_value
+        self._keep()
+
+    def band(self, x0, x1):
+        if self._cache is not None:
+            return self._cache[x0:x1]
+        return self._evaluate_band(x0, x1).astype(self.dtype)
+
+    def _evaluate_band(self, x0, x1):
+        xs, ys = np.ogrid[x0:min(x1, self.grid_size), 0:self.grid_size]
+        return self.evaluate(xs, ys)
+
+    def __getitem__(self, key):
+        if self._cache is not None:
+            return self._cache[key]
+        x, y = key
+        return self.evaluate(np.asarray(x), np.asarray(y))
+
+    def evaluate(self, x, y):
+        return self.func(x, y, self.grid_size)
+
+    def __getstate__(self):
+        # the cache is rebuilt on load
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._keep()
+
+    def _keep(self):
+        if self.grid_size * self.grid_size <= TILE_CELLS:
+            self._cache = self.band(0, self.grid_size)
+
+class TwoPeakLandscape(FunctionLandscape):
+    # Two hills of height `peak` at fractional centres of each period, falling
+    # by one every `ring` x period cells of (toroidal) distance. repeat > 1
+    # tiles the period repeat x repeat times across the grid. The hills are
+    # evaluated once: when the period is a whole number of cells and fits in
+    # TILE_CELLS, its motif is computed (band by band) and tiled; otherwise
+    # the whole grid is kept in the sugar dtype (one byte per cell, as much
+    # as the sugar itself; save_landscape() it to keep it on disk instead).
+    def __init__(self, grid_size, peak=4, ring=0.08, centres=((0.3, 0.7), (0.7, 0.3)), repeat=1):
+        self.peak = peak
+        self.repeat = repeat
+        self.period = grid_size / repeat
+        self.ring = ring * self.period
+        self.centres = [(cx * self.period, cy * self.period) for cx, cy in centres]
+        self._motif = None
+        super().__init__(grid_size, func=None, max_value=peak)
+
+    def _keep(self):
+        super()._keep()
+        if self._cache is not None or self._motif is not None:
+            return
+        period = self.grid_size // self.repeat
+        if self.repeat > 1 and self.grid_size % self.repeat == 0 and period * period <= TILE_CELLS:
+            self._motif = np.empty((period, period), dtype=self.dtype)
+            step = max(1, TILE_CELLS // period)
+            for x0 in range(0, period, step):
+                x1 = min(x0 + step, period)
+                xs, ys = np.ogrid[x0:x1, 0:period]
+                self._motif[x0:x1] = self.evaluate(xs, ys)
+        else:
+            self._cache = self.materialize()
+
+    def band(self, x0, x1):
+        if self._cache is None and self._motif is not None:
+            rows = self._motif[np.arange(x0, x1) % len(self._motif)]
+            return np.tile(rows, (1, self.repeat))
+        return super().band(x0, x1)
+
+    def evaluate(self, x, y):
+        p = self.period
+        x = np.mod(x, p)
+        y = np.mod(y, p)
+        level = np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y)), dtype=np.int64)
+        for cx, cy in self.centres:
+            dx = np.abs(x - cx)
+            dy = np.abs(y - cy)
+            dist = np.hypot(np.minimum(dx, p - dx), np.minimum(dy, p - dy))
+            level = np.maximum(level, self.peak - (dist // self.ring).astype(np.int64))
+        return np.maximum(level, 0)
+
+class ArrayLandscape(Landscape):
+    def __init__(self, array):
+        if array.ndim != 2 or array.shape[0] != array.shape[1]:
+            raise ValueError(f"Capacity must be a square 2D array, got shape {array.shape}")
+        self.array = array
+        self.grid_size = array.shape[0]
+        self.max_value = max(int(cap.max()) for _, _, cap in self.tiles())
+
+    def band(self, x0, x1):
+        return self.array[x0:x1]
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+class MemmapLandscape(ArrayLandscape):
+    # Capacity in a .npy file, read through a read-only memmap; only the
+    # path is pickled (checkpoints), the file is reopened on load
+    def __init__(self, path):
+        self.path = path
+        super().__init__(np.load(path, mmap_mode="r"))
+
+    def cache_key(self):
+        # the file, not its contents, identifies the landscape (see runcache.py)
+        stat = os.stat(self.path)
+        return [os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+def save_landscape(landscape, path):
+    # Writes any landscape to a .npy file band by band; returns a MemmapLandscape
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=landscape.dtype, shape=landscape.shape)
+    for x0, x1, cap in landscape.tiles():
+        out[x0:x1] = cap
+    out.flush()
+    del out
+    return MemmapLandscape(path)
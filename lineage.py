@@ -0,0 +1,256 @@
+import os
+import numpy as np
+
+# Append-only genealogy of an evolving run (EvolSugarscape, EmpoweredSugarscape).
+# Every birth is one typed record (id, parent, birth turn, sight, strategy)
+# and every death one (id, turn). Both are buffered and appended in chunks
+# to births.bin / deaths.bin, or kept in memory without an out_dir, so the
+# log costs ~30 bytes per agent however many are born. The agents alive
+# when logging starts are the founders (parent -1).
+# Ids only grow, so a child's record always comes after its parent's and
+# the whole log can be searched by id. Genealogy answers the queries with
+# array passes (pointer jumping over the parent links), not per-agent walks.
+# A model loaded from a checkpoint continues its log from the checkpoint
+# turn; checkpoint.fork_checkpoint gives each branch its own copy.
+#
+#     model.run_simulation(lineage="task3_lineage")
+#     tree = open_lineage("task3_lineage")
+#     tree.ancestors(tree.id[-1]); tree.founder_share(); tree.mutation_counts()
+
+BIRTHS = "births.bin"
+DEATHS = "deaths.bin"
+CHUNK_ROWS = 1 << 16
+NO_PARENT = -1
+ALIVE = -1  # death turn of an agent still alive at the end of the log
+
+BIRTH = np.dtype([("id", np.int64), ("parent", np.int64), ("turn", np.int32),
+                  ("sight", np.int8), ("strategy", np.bool_)])
+DEATH = np.dtype([("id", np.int64), ("turn", np.int32)])
+
+class Lineage:
+    def __init__(self, out_dir=None, chunk_rows=CHUNK_ROWS):
+        self.out_dir = out_dir
+        self.chunk_rows = chunk_rows
+        self.num_births = 0
+        self.num_deaths = 0
+        self._pending = {BIRTHS: [], DEATHS: []}
+        self._pending_rows = 0
+        self._chunks = {BIRTHS: [], DEATHS: []}  # flushed records, without an out_dir
+        self._restored = False
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+            for name in (BIRTHS, DEATHS):
+                open(os.path.join(out_dir, name), "wb").close()
+
+    def birth(self, ids, parents, turn, sight, strategy):
+        # array arguments, or scalars broadcast over ids
+        ids = np.atleast_1d(ids)
+        records = np.empty(len(ids), dtype=BIRTH)
+        records["id"] = ids
+        records["parent"] = parents
+        records["turn"] = turn
+        records["sight"] = sight
+        records["strategy"] = strategy
+        self.num_births += len(ids)
+        self._append(BIRTHS, records)
+
+    def death(self, ids, turn):
+        ids = np.atleast_1d(ids)
+        records = np.empty(len(ids), dtype=DEATH)
+        records["id"] = ids
+        records["turn"] = turn
+        self.num_deaths += len(ids)
+        self._append(DEATHS, records)
+
+    def _append(self, name, records):
+        if len(records):
+            self._pending[name].append(records)
+            self._pending_rows += len(records)
+            if self._pending_rows >= self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        if self._restored:
+            self._cut_back()
+        for name, pending in self._pending.items():
+            if not pending:
+                continue
+            records = np.concatenate(pending)
+            if self.out_dir is None:
+                self._chunks[name].append(records)
+            else:
+                with open(os.path.join(self.out_dir, name), "ab") as f:
+                    records.tofile(f)
+            pending.clear()
+        self._pending_rows = 0
+
+    def close(self):
+        self.flush()
+
+    def __getstate__(self):
+        # A checkpoint keeps the record counts. The files may have grown past
+        # them since; they are only cut back once the loaded log is written
+        # to again, so loading a checkpoint leaves them untouched.
+        self.flush()
+        state = self.__dict__.copy()
+        state["_restored"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._restored = self.out_dir is not None
+
+    def _cut_back(self):
+        # back to the records written before the checkpoint (counts less what is pending)
+        for name, dtype, count in ((BIRTHS, BIRTH, self.num_births), (DEATHS, DEATH, self.num_deaths)):
+            count -= sum(len(records) for records in self._pending[name])
+            path = os.path.join(self.out_dir, name)
+            if os.path.getsize(path) > count * dtype.itemsize:
+                os.truncate(path, count * dtype.itemsize)
+        self._restored = False
+
+    def fork(self, out_dir=None):
+        # Copy of the log so far in out_dir (or in memory), for a branched continuation
+        births, deaths = self.records()
+        fork = Lineage(out_dir, self.chunk_rows)
+        fork.num_births, fork.num_deaths = len(births), len(deaths)
+        fork._pending[BIRTHS].append(np.array(births))
+        fork._pending[DEATHS].append(np.array(deaths))
+        fork.flush()
+        return fork
+
+    def records(self):
+        # (births, deaths) record arrays of everything logged so far
+        if not self._restored:
+            self.flush()
+        if self.out_dir is not None:
+            return (_read(self.out_dir, BIRTHS, BIRTH, self.num_births),
+                    _read(self.out_dir, DEATHS, DEATH, self.num_deaths))
+        return tuple(np.concatenate(self._chunks[name]) if self._chunks[name] else np.zeros(0, dtype)
+                     for name, dtype in ((BIRTHS, BIRTH), (DEATHS, DEATH)))
+
+    def tree(self):
+        return Genealogy(*self.records())
+
+def attach_lineage(model, lineage):
+    # lineage: a Lineage or a directory. A model that already keeps a log
+    # (e.g. loaded from a checkpoint) continues it, copied into a new
+    # directory if another one is given. A new log starts with the model's
+    # living agents as founders.
+    current = getattr(model, "lineage", None)
+    if not isinstance(lineage, Lineage):
+        if current is None:
+            lineage = Lineage(lineage)
+        elif current.out_dir is not None and os.path.abspath(current.out_dir) == os.path.abspath(lineage):
+            lineage = current
+        else:
+            lineage = current.fork(lineage)
+    if lineage.num_births == 0:
+        agents = model.agents
+        living = agents.living()
+        lineage.birth(agents.id[living], NO_PARENT, model.grid.turn, agents.sight[living], agents.uses_empowerment[living])
+    model.lineage = lineage
+    return lineage
+
+def _read(out_dir, name, dtype, limit=None):
+    # Memory-mapped records (the first `limit` of them); a torn record at the
+    # end (crash mid-write) is ignored
+    path = os.path.join(out_dir, name)
+    count = os.path.getsize(path) // dtype.itemsize
+    if limit is not None:
+        count = min(count, limit)
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+def open_lineage(out_dir):
+    return Genealogy(_read(out_dir, BIRTHS, BIRTH), _read(out_dir, DEATHS, DEATH))
+
+class Genealogy:
+    # Columns are indexed by row, in id order; parent_row is -1 for founders
+    def __init__(self, births, deaths):
+        self.id = np.asarray(births["id"])
+        self.birth = np.asarray(births["turn"])
+        self.sight = np.asarray(births["sight"])
+        self.strategy = np.asarray(births["strategy"])
+        self.parent = np.asarray(births["parent"])
+        self.parent_row = np.where(self.parent == NO_PARENT, -1, self.row(self.parent))
+        self.death = np.full(len(self.id), ALIVE, dtype=np.int32)
+        self.death[self.row(deaths["id"])] = deaths["turn"]
+        self._founder_row = None
+
+    def __len__(self):
+        return len(self.id)
+
+    def row(self, agent_ids):
+        # ids are dense when logging started at turn 0
+        if len(self.id) and self.id[-1] - self.id[0] == len(self.id) - 1:
+            return np.asarray(agent_ids) - self.id[0]
+        return np.searchsorted(self.id, agent_ids)
+
+    def ancestors(self, agent_id):
+        # Ids from agent_id back to its founder
+        chain = []
+        r = int(self.row(agent_id))
+        if not 0 <= r < len(self.id) or self.id[r] != agent_id:
+            raise KeyError(agent_id)
+        while r >= 0:
+            chain.append(int(self.id[r]))
+            r = int(self.parent_row[r])
+        return np.array(chain, dtype=np.int64)
+
+    def _jump(self, values, combine):
+        # Folds values along every ancestor chain by pointer jumping
+        up = self.parent_row.copy()
+        values = values.copy()
+        while True:
+            has = np.flatnonzero(up >= 0)
+            if len(has) == 0:
+                return values
+            values[has] = combine(values[has], values[up[has]])
+            up[has] = up[up[has]]
+
+    def founder_rows(self):
+        if self._founder_row is None:
+            rows = np.arange(len(self.id))
+            self._founder_row = self._jump(rows, lambda own, above: above)
+        return self._founder_row
+
+    def founders(self):
+        # Founder id of every agent
+        return self.id[self.founder_rows()]
+
+    def founder_share(self, last_turn=None):
+        # (founder ids, shares) with shares[t, k] the fraction of agents alive
+        # at the end of turn t that descend from founder k
+        founder_rows = self.founder_rows()
+        founder_ids, column = np.unique(self.id[founder_rows], return_inverse=True)
+        end = int(max(self.birth.max(initial=0), self.death.max(initial=0)))
+        if last_turn is None:
+            last_turn = end
+        k = len(founder_ids)
+        span = (max(end, last_turn) + 2) * k
+        died = self.death != ALIVE
+        birth = self.birth.astype(np.int64)
+        death = self.death[died].astype(np.int64)
+        counts = (np.bincount(birth * k + column, minlength=span)
+                  - np.bincount(death * k + column[died], minlength=span))
+        alive = np.cumsum(counts.reshape(-1, k), axis=0)[:last_turn + 1]
+        total = alive.sum(axis=1, keepdims=True)
+        return founder_ids, np.divide(alive, total, out=np.zeros(alive.shape), where=total > 0)
+
+    def mutated(self):
+        # Whether each agent's sight differs from its parent's
+        has = self.parent_row >= 0
+        out = np.zeros(len(self.id), dtype=bool)
+        out[has] = self.sight[has] != self.sight[self.parent_row[has]]
+        return out
+
+    def mutation_counts(self):
+        # Sight mutations along each agent's line back to its founder
+        return self._jump(self.mutated().astype(np.int64), np.add)
+
+    def mutations_per_turn(self, last_turn=None):
+        mutated = self.mutated()
+        length = (last_turn if last_turn is not None else int(self.birth.max(initial=0))) + 1
+        return np.bincount(self.birth[mutated], minlength=length)[:length]
@@ -0,0 +1,140 @@
+import numpy as np
+from agents import FIELDS
+
+# Per-turn statistics computed straight from the AgentStore arrays.
+# A metric is named "stat[:field][@group]", e.g. "count", "mean:sight",
+# "quantiles:energy@emp" or "hist:sight@non_emp". Stats and groups are
+# looked up by name in OBSERVERS and GROUPS (add your own with
+# @observer / GROUPS[name] = mask function); the field is an AgentStore
+# field, "id" by default. Binned stats (hist) need bin edges for their field
+# (EDGES, or Metrics(edges=...)). Specs are checked when the Metrics object
+# is built. It only gathers the fields and group masks its metrics name,
+# once per turn, and keeps the rows (for series()) only with keep_rows=True.
+#
+#     metrics = Metrics({"AvgSight": "mean:sight", "EnergyP": "quantiles:energy"})
+#     row = metrics.measure(model)   # {"AvgSight": 3.2, "EnergyP_q05": ..., ...}
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+EDGES = {
+    "sight": np.arange(0, 12),  # one bin per sight 0..10
+    "energy": np.array([0, 5, 10, 20, 40, 80, np.inf]),
+}
+
+# name -> (function(values, edges) -> value or array, column suffixes(edges) or None, dtype,
+#          whether it bins by edges)
+OBSERVERS = {}
+
+def observer(name, dtype=np.float64, suffixes=None, binned=False):
+    def register(fn):
+        OBSERVERS[name] = (fn, suffixes, dtype, binned)
+        return fn
+    return register
+
+@observer("count", np.int64)
+def count(values, edges):
+    return len(values)
+
+@observer("sum", np.int64)
+def total(values, edges):
+    return int(values.sum())
+
+@observer("mean")
+def mean(values, edges):
+    return float(values.mean()) if len(values) else 0
+
+@observer("var")
+def var(values, edges):
+    return float(values.var()) if len(values) else 0
+
+@observer("min", np.int64)
+def minimum(values, edges):
+    return int(values.min()) if len(values) else 0
+
+@observer("max", np.int64)
+def maximum(values, edges):
+    return int(values.max()) if len(values) else 0
+
+@observer("quantiles", suffixes=lambda edges: [f"q{round(100*q):02d}" for q in QUANTILES])
+def quantiles(values, edges):
+    if not len(values):
+        return np.zeros(len(QUANTILES))
+    return np.quantile(values, QUANTILES)
+
+@observer("hist", np.int64, suffixes=lambda edges: [f"{lo:g}" for lo in edges[:-1]], binned=True)
+def hist(values, edges):
+    return np.histogram(values, edges)[0]
+
+# group name -> function(agents, living rows) -> boolean mask over those rows
+GROUPS = {
+    "emp": lambda agents, rows: agents.uses_empowerment[rows],
+    "non_emp": lambda agents, rows: ~agents.uses_empowerment[rows],
+}
+
+def parse(spec, edges=EDGES):
+    # "stat[:field][@group]" -> (stat, field, group); edges: bin edges by field
+    spec, _, group = spec.partition("@")
+    stat, _, field = spec.partition(":")
+    field = field or "id"
+    if stat not in OBSERVERS:
+        raise ValueError(f"Unknown statistic {stat!r}, expected one of {sorted(OBSERVERS)}")
+    if field not in FIELDS:
+        raise ValueError(f"Unknown field {field!r}, expected one of {sorted(FIELDS)}")
+    if group and group not in GROUPS:
+        raise ValueError(f"Unknown group {group!r}, expected one of {sorted(GROUPS)}")
+    if OBSERVERS[stat][3]:
+        if field not in edges:
+            raise ValueError(f"{stat!r} needs bin edges for {field!r}, have edges for {sorted(edges)}")
+        bins = np.asarray(edges[field])
+        if bins.ndim != 1 or len(bins) < 2 or np.any(np.diff(bins) <= 0):
+            raise ValueError(f"Bin edges for {field!r} must be at least two increasing values, got {edges[field]!r}")
+    return stat, field, group or None
+
+class Metrics:
+    def __init__(self, specs, edges=None, keep_rows=False):
+        # specs: {output name: "stat[:field][@group]"}; keep_rows: keep every
+        # measured row in self.rows (otherwise None, so the object stays small)
+        self.edges = dict(EDGES, **(edges or {}))
+        self.specs = {name: parse(spec, self.edges) for name, spec in specs.items()}
+        self.columns = []  # (column, dtype), in output order
+        for name, (stat, field, group) in self.specs.items():
+            _, suffixes, dtype, _ = OBSERVERS[stat]
+            if suffixes is None:
+                self.columns.append((name, dtype))
+            else:
+                self.columns += [(f"{name}_{s}", dtype) for s in suffixes(self.edges.get(field))]
+        self.rows = [] if keep_rows else None
+
+    def measure(self, model):
+        # One turn of statistics as {column: value}
+        agents = model.agents
+        living = agents.living()
+        masks = {}
+        values = {}
+        row = {}
+        for name, (stat, field, group) in self.specs.items():
+            key = (field, group)
+            if key not in values:
+                v = getattr(agents, field)[living]
+                if group is not None:
+                    if group not in masks:
+                        masks[group] = GROUPS[group](agents, living)
+                    v = v[masks[group]]
+                values[key] = v
+            fn, suffixes, _, _ = OBSERVERS[stat]
+            result = fn(values[key], self.edges.get(field))
+            if suffixes is None:
+                row[name] = result
+            else:
+                row.update(zip((f"{name}_{s}" for s in suffixes(self.edges.get(field))), result.tolist()))
+        self.record(row)
+        return row
+
+    def record(self, row):
+        if self.rows is not None:
+            self.rows.append(row)
+
+    def series(self):
+        # {column: array over the measured turns} (needs keep_rows=True)
+        if self.rows is None:
+            raise ValueError("Rows were not kept, build the Metrics with keep_rows=True")
+        return {column: np.array([row[column] for row in self.rows], dtype=dtype) for column, dtype in self.columns}
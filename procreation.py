@@ -0,0 +1,74 @@
+import numpy as np
+from grid import EMPTY
+
+# Vectorized consumption and procreation phase for the evolving models.
+# Every living agent pays one unit of energy; those at zero die and free
+# their cells. Survivors above the procreation threshold try to place one
+# child on a free von Neumann neighbour (free after this turn's deaths).
+# Parents get a random priority. In each round every unresolved parent
+# picks a random unclaimed free neighbour and the highest-priority parent
+# wins each contested cell. A loser has one option fewer every round, so
+# four rounds settle everyone. Children are appended in one step.
+# Deaths and births go to model.lineage when the run keeps one (lineage.py).
+
+NEIGHBOURS = (np.array([1, -1, 0, 0]), np.array([0, 0, 1, -1]))
+
+def consume_and_procreate(model):
+    grid = model.grid
+    agents = model.agents
+    n = grid.grid_size
+    living = agents.living()
+    agents.energy[living] -= 1
+    dead = living[agents.energy[living] <= 0]
+    agents.alive[dead] = False
+    grid.vacate(agents.x[dead], agents.y[dead])
+    lineage = getattr(model, "lineage", None)
+    if lineage is not None:
+        lineage.death(agents.id[dead], grid.turn)
+
+    parents = living[agents.energy[living] > model.procreation_threshold]
+    if len(parents) == 0:
+        return
+    dx, dy = NEIGHBOURS
+    cx = (agents.x[parents, None].astype(np.int64) + dx) % n
+    cy = (agents.y[parents, None].astype(np.int64) + dy) % n
+    cells = cx * n + cy
+    free = grid.occupancy[cx, cy] == EMPTY
+
+    m = len(parents)
+    priority = model.rng.permutation(m)
+    pick = np.full(m, -1)
+    claimed = np.zeros(n * n, dtype=bool)
+    for _ in range(len(dx)):
+        avail = free & ~claimed[cells]
+        rows = np.flatnonzero((pick < 0) & avail.any(axis=1))
+        if len(rows) == 0:
+            break
+        # uniform choice among the remaining free neighbours
+        choice = np.argmax(np.where(avail[rows], model.rng.random_array((len(rows), len(dx))), -1.0), axis=1)
+        want = cells[rows, choice]
+        order = np.lexsort((priority[rows], want))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = want[order][1:] != want[order][:-1]
+        winners = order[first]
+        pick[rows[winners]] = choice[winners]
+        claimed[want[winners]] = True
+
+    born = pick >= 0
+    parents = parents[born]
+    child_x = cx[born, pick[born]]
+    child_y = cy[born, pick[born]]
+    # split energy
+    child_energy = agents.energy[parents] // 2
+    agents.energy[parents] -= child_energy
+    # mutation: 1 in 11 loses a unit of sight, 1 in 11 gains one, within sight_range
+    low, high = model.sight_range
+    sight = agents.sight[parents].astype(np.int64)
+    mutation = model.rng.integers(0, 11, size=len(parents))
+    sight -= (mutation == 0) & (sight > low)
+    sight += (mutation == 1) & (sight < high)
+
+    children = agents.add_many(child_x, child_y, child_energy, sight, agents.uses_empowerment[parents])
+    grid.place(child_x, child_y, agents.id[children])
+    if lineage is not None:
+        lineage.birth(agents.id[children], agents.id[parents], grid.turn, sight, agents.uses_empowerment[children])
@@ -0,0 +1,208 @@
+import sys
+import time
+import threading
+import cProfile
+from collections import Counter
+
+# Per-phase instrumentation for the Sugarscape models.
+# Profiler.attach(model) wraps the model's phase methods (and the grid /
+# empowerment lookups they call) on that instance only, so a model without
+# a profiler runs the plain methods with no overhead at all. A turn starts at
+# sugar_growth_phase and ends when the next one starts (or at finish()).
+#
+#     prof = Profiler(cprofile_turns=(100, 110))
+#     model.run_simulation(profiler=prof)
+#     print(prof.table()); print(prof.summary())
+
+PHASES = ("growth", "movement", "empowerment", "consumption")
+COUNTERS = ("candidates", "emp_evals", "births", "deaths")
+
+class Profiler:
+    def __init__(self, cprofile_turns=None, sample_turns=None, sample_interval=0.001, stats_file=None):
+        # cprofile_turns / sample_turns: inclusive (first, last) turn windows
+        self.cprofile_turns = cprofile_turns
+        self.sample_turns = sample_turns
+        self.sample_interval = sample_interval
+        self.stats_file = stats_file
+        self.rows = []
+        self.model = None
+        self.cprofile = None
+        self.samples = Counter()
+        self._sampler = None
+        self._row = None
+
+    # -- wiring -------------------------------------------------------------
+
+    def attach(self, model):
+        self.model = model
+        model.profiler = self
+        self._originals = {}
+        consumption = "consumption_phase_and_procreation" if hasattr(model, "consumption_phase_and_procreation") else "consumption_phase"
+        self._wrap(model, "sugar_growth_phase", self._timed("growth", before=self._start_turn))
+        self._wrap(model, "agent_movement_phase", self._timed("movement"))
+        self._wrap(model, consumption, self._timed("consumption"))
+        self._wrap(model.grid, "candidates", self._counted("candidates"))
+        for name in ("empowerment", "cell_empowerment"):
+            if hasattr(model, name):
+                self._wrap(model, name, self._timed("empowerment", counter="emp_evals"))
+        return self
+
+    def detach(self):
+        for (obj, name) in self._originals:
+            del obj.__dict__[name]
+        self._originals = {}
+        if self.model is not None:
+            self.model.__dict__.pop("profiler", None)
+
+    def _wrap(self, obj, name, make):
+        self._originals[(obj, name)] = getattr(obj, name)
+        setattr(obj, name, make(getattr(obj, name)))
+
+    def _timed(self, phase, before=None, counter=None):
+        def make(method):
+            def wrapper(*args, **kwargs):
+                if before is not None:
+                    before()
+                start = time.perf_counter()
+                result = method(*args, **kwargs)
+                row = self._row
+                row[phase] += time.perf_counter() - start
+                if counter is not None:
+                    row[counter] += _size(args[0]) if args else 1
+                return result
+            return wrapper
+        return make
+
+    def _counted(self, counter):
+        def make(method):
+            def wrapper(*args, **kwargs):
+                result = method(*args, **kwargs)
+                self._row[counter] += len(result[0])
+                return result
+            return wrapper
+        return make
+
+    def count(self, counter, k):
+        # for work done outside the wrapped methods (batched moves)
+        if self._row is not None:
+            self._row[counter] += k
+
+    # -- turns --------------------------------------------------------------
+
+    def _start_turn(self):
+        self._end_turn()
+        agents = self.model.agents
+        turn = self.model.grid.turn + 1
+        self._row = dict.fromkeys(PHASES + COUNTERS, 0)
+        self._row.update(turn=turn, start=time.perf_counter(),
+                         living_before=agents.num_alive(), next_id=agents.next_id)
+        self._windows(turn)
+
+    def _end_turn(self):
+        row = self._row
+        if row is None:
+            return
+        agents = self.model.agents
+        row["total"] = time.perf_counter() - row.pop("start")
+        row["other"] = row["total"] - row["growth"] - row["movement"] - row["consumption"]
+        row["births"] = agents.next_id - row.pop("next_id")
+        row["living"] = agents.num_alive()
+        row["deaths"] = row.pop("living_before") + row["births"] - row["living"]
+        row["stored"] = len(agents)
+        self.rows.append(row)
+        self._row = None
+
+    def _windows(self, turn):
+        window = self.cprofile_turns
+        if window is not None:
+            if turn == window[0]:
+                self.cprofile = cProfile.Profile()
+                self.cprofile.enable()
+            elif turn == window[1] + 1 and self.cprofile is not None:
+                self.cprofile.disable()
+        window = self.sample_turns
+        if window is not None:
+            if turn == window[0]:
+                self._sampler = _Sampler(threading.get_ident(), self.sample_interval, self.samples)
+                self._sampler.start()
+            elif turn == window[1] + 1:
+                self._stop_sampler()
+
+    def _stop_sampler(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+    def finish(self):
+        self._end_turn()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            if self.stats_file:
+                self.cprofile.dump_stats(self.stats_file)
+        self._stop_sampler()
+        self.detach()
+
+    # -- reports ------------------------------------------------------------
+
+    def table(self):
+        cols = ["turn", "living", "stored", "births", "deaths", "candidates", "emp_evals"]
+        times = ["growth", "movement", "empowerment", "consumption", "other", "total"]
+        header = " ".join(f"{c:>10}" for c in cols + [t + "_ms" for t in times])
+        lines = [header]
+        for row in self.rows:
+            lines.append(" ".join([f"{row[c]:>10}" for c in cols] + [f"{row[t]*1000:>13.3f}" for t in times]))
+        return "\n".join(lines)
+
+    def summary(self):
+        if not self.rows:
+            return "No turns recorded."
+        total = sum(r["total"] for r in self.rows)
+        agent_turns = sum(r["living"] for r in self.rows) or 1
+        lines = [f"{len(self.rows)} turns in {total:.3f}s ({len(self.rows)/total:.1f} turns/s)"]
+        for phase in PHASES + ("other",):
+            t = sum(r[phase] for r in self.rows)
+            note = " (inside movement)" if phase == "empowerment" else ""
+            lines.append(f"  {phase:<12} {t:9.3f}s {100*t/total:6.1f}%  {1e6*t/agent_turns:8.2f} us/agent-turn{note}")
+        for counter in COUNTERS:
+            lines.append(f"  {counter:<12} {sum(r[counter] for r in self.rows):>10}")
+        last = self.rows[-1]
+        lines.append(f"  living/stored at end: {last['living']}/{last['stored']}")
+        if self.samples:
+            lines.append("  top sampled frames:")
+            for where, hits in self.samples.most_common(10):
+                lines.append(f"    {hits:>6}  {where}")
+        return "\n".join(lines)
+
+    def print_stats(self, sort="cumulative", limit=20):
+        import pstats
+        if self.cprofile is not None:
+            pstats.Stats(self.cprofile).sort_stats(sort).print_stats(limit)
+
+class _Sampler(threading.Thread):
+    # Minimal wall-clock sampler of one thread's innermost frame
+    def __init__(self, thread_id, interval, samples):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = samples
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                code = frame.f_code
+                self.samples[f"{code.co_filename}:{frame.f_lineno} {code.co_name}"] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def _size(x):
+    # cells looked up: an array's size, a list's length, 1 for a scalar
+    if hasattr(x, "size"):
+        return int(x.size)
+    try:
+        return len(x)
+    except TypeError:
+        return 1
@@ -0,0 +1,105 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from telemetry import open_run
+
+# Animation export for telemetry runs (see telemetry.py; record them with
+# snapshot_every=N). Frames are split into contiguous segments rendered on a
+# process pool. Each worker builds one figure and updates the imshow and
+# scatter data in place for every frame of its segment.
+#
+# out may be:
+#   a directory           -> one PNG per frame, no assembly step
+#   *.mp4 / *.webm / ...  -> ffmpeg segment per worker, joined with ffmpeg concat
+#   *.gif                 -> Pillow segment per worker, joined by Pillow
+#                            (Pillow keeps the GIF frames in memory; prefer
+#                            mp4 for very long runs)
+
+def _frame_figure(run, first_turn, vmax, dpi):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    sugar = run.sugar_at(first_turn)
+    n = sugar.shape[0]
+    fig, ax = plt.subplots(figsize=(6,6), dpi=dpi)
+    im = ax.imshow(sugar.T, origin="lower", cmap="YlOrBr", interpolation="nearest", vmin=0, vmax=vmax)
+    plt.colorbar(im, ax=ax, label="Sugar level")
+    scatter = ax.scatter(np.zeros(0), np.zeros(0), c='red', edgecolors='black', label='Agents')
+    ax.set_xlim(-0.5, n-0.5)
+    ax.set_ylim(-0.5, n-0.5)
+    ax.set_xticks(range(0,n,5))
+    ax.set_yticks(range(0,n,5))
+    ax.legend(loc="upper right")
+    return fig, ax, im, scatter
+
+def _draw(run, t, ax, im, scatter):
+    im.set_data(run.sugar_at(t).T)
+    scatter.set_offsets(run.positions(t))
+    ax.set_title(f"Turn {t} - Agents and Sugar Distribution")
+
+def render_segment(source, turns, out, first_index, vmax, fps, dpi):
+    import matplotlib.pyplot as plt
+    from matplotlib import animation
+    run = open_run(source)
+    fig, ax, im, scatter = _frame_figure(run, turns[0], vmax, dpi)
+    if os.path.isdir(out):
+        for i, t in enumerate(turns):
+            _draw(run, t, ax, im, scatter)
+            fig.savefig(os.path.join(out, f"frame_{first_index+i:06d}.png"), dpi=dpi)
+    else:
+        writer = animation.PillowWriter(fps=fps) if out.endswith(".gif") else animation.FFMpegWriter(fps=fps)
+        with writer.saving(fig, out, dpi):
+            for t in turns:
+                _draw(run, t, ax, im, scatter)
+                writer.grab_frame()
+    plt.close(fig)
+    return out
+
+def render_animation(source, out="task2_animation.gif", every=1, workers=None, fps=10, dpi=80):
+    run = open_run(source)
+    turns = [t for t in run.snapshot_turns if t % every == 0]
+    if not turns:
+        raise ValueError(f"No snapshots in {source} fall on a multiple of every={every}")
+    vmax = float(run.sugar.max())
+    workers = workers or os.cpu_count() or 1
+    segments = [s.tolist() for s in np.array_split(turns, min(len(turns), workers * 2))]
+    ext = os.path.splitext(out)[1]
+    as_frames = not ext
+    if as_frames:
+        os.makedirs(out, exist_ok=True)
+    elif ext != ".gif" and shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is required for video output; use a .gif or a frames directory instead")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = []
+        first = 0
+        for k, seg in enumerate(segments):
+            target = out if as_frames else os.path.join(tmp, f"segment_{k:04d}{ext}")
+            jobs.append((seg, target, first))
+            first += len(seg)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_segment, source, seg, target, i, vmax, fps, dpi) for seg, target, i in jobs]
+            parts = [f.result() for f in futures]
+        if not as_frames:
+            _join_segments(parts, out, fps)
+    return out
+
+def _join_segments(parts, out, fps):
+    if out.endswith(".gif"):
+        from PIL import Image, ImageSequence
+        def frames():
+            for part in parts:
+                with Image.open(part) as im:
+                    for frame in ImageSequence.Iterator(im):
+                        yield frame.copy()
+        it = frames()
+        first = next(it)
+        first.save(out, save_all=True, append_images=it, duration=int(1000/fps), loop=0)
+        return
+    listing = os.path.join(os.path.dirname(parts[0]), "segments.txt")
+    with open(listing, "w") as f:
+        f.writelines(f"file '{p}'\n" for p in parts)
+    subprocess.run([shutil.which("ffmpeg"), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", listing, "-c", "copy", out], check=True)
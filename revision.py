@@ -0,0 +1,13 @@
+import os
+import subprocess
+
+# Git revision of the checkout this code runs from, recorded in benchmark
+# results and run manifests. Looked up next to this file, not in the
+# current directory, which may be another repository (or none).
+
+def revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
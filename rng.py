@@ -0,0 +1,77 @@
+import numpy as np
+
+# Per-model random stream. Each model owns one BlockRNG, so seeded runs are
+# reproducible and several models can run side by side (threads, processes,
+# forks of a checkpoint) without sharing state.
+# Scalar draws in the per-agent loops are served from a block of uniforms
+# drawn in bulk from a numpy Generator and refilled when used up. Array
+# draws go straight to the Generator.
+#
+#     model = EvolSugarscape(rng=42)            # seed
+#     model = EvolSugarscape(rng=BlockRNG(seq)) # any numpy seed / SeedSequence
+
+BLOCK = 4096
+
+def as_rng(rng=None):
+    # None (fresh entropy), an int / SeedSequence / Generator, or a BlockRNG
+    if isinstance(rng, BlockRNG):
+        return rng
+    return BlockRNG(rng)
+
+class BlockRNG:
+    def __init__(self, seed=None, block=BLOCK):
+        self.generator = np.random.default_rng(seed)
+        self.block = block
+        self._buf = []
+        self._pos = 0
+
+    def _refill(self):
+        self._buf = self.generator.random(self.block).tolist()
+        self._pos = 0
+
+    # -- scalar draws (pre-drawn block) -----------------------------------
+
+    def random(self):
+        if self._pos == len(self._buf):
+            self._refill()
+        u = self._buf[self._pos]
+        self._pos += 1
+        return u
+
+    def randoms(self, k):
+        # the next k scalar draws, as k calls to random() would give them
+        out = []
+        while len(out) < k:
+            if self._pos == len(self._buf):
+                self._refill()
+            take = min(k - len(out), len(self._buf) - self._pos)
+            out += self._buf[self._pos:self._pos + take]
+            self._pos += take
+        return out
+
+    def randrange(self, n):
+        # 0 <= k < n
+        return int(self.random() * n)
+
+    def randint(self, a, b):
+        # a <= k <= b, like random.randint
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    # -- array draws --------------------------------------------------------
+
+    def random_array(self, shape):
+        return self.generator.random(shape)
+
+    def integers(self, low, high, size=None):
+        # low <= k < high
+        return self.generator.integers(low, high, size)
+
+    def permutation(self, x):
+        return self.generator.permutation(x)
+
+    def spawn(self, n):
+        # n independent child streams
+        return [BlockRNG(g, self.block) for g in self.generator.spawn(n)]
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import shutil
+import types
+import hashlib
+import numpy as np
+from telemetry import open_run
+
+# Content-addressed cache of finished runs. The key hashes the model class,
+# its constructor arguments (model.config), the seed, the run arguments that
+# shape the output (turns, snapshots, metrics) and the source of the code
+# itself, so any edit to a .py file invalidates old entries. Functions passed
+# as arguments (e.g. a FunctionLandscape's func) are keyed by their code,
+# defaults, closure values and referenced globals. An entry is the
+# run's telemetry directory (telemetry.py), so analyze_results / plot_csv /
+# load_series read it directly. Entries are evicted least-recently-used
+# first once the cache grows past max_bytes.
+#
+#     cache = RunCache()
+#     data = EvolSugarscape(rng=1).run_simulation(cache=cache)  # runs once
+#     data = EvolSugarscape(rng=1).run_simulation(cache=cache)  # read back
+#
+# Only runs that are reproducible are cached: the seed must be an int or a
+# SeedSequence, and the model must start from turn 0.
+
+CACHE_DIR = os.environ.get("SUGARSCAPE_CACHE", ".sugarscape_cache")
+CACHE_BYTES = 2 * 1024**3
+ENTRY = "entry.json"
+KEY_ARGS = ("turns", "snapshot_every", "snapshot_turns", "metrics", "stop")
+
+_code_versions = {}
+
+def module_name(module):
+    # A model run as a script is keyed under its file name, not __main__
+    if module == "__main__":
+        return os.path.splitext(os.path.basename(sys.modules[module].__file__))[0]
+    return module
+
+def code_version(module):
+    # Hash of every .py file next to the model's module
+    directory = os.path.dirname(os.path.abspath(sys.modules[module].__file__))
+    if directory not in _code_versions:
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                h.update(name.encode())
+                with open(os.path.join(directory, name), "rb") as f:
+                    h.update(f.read())
+        _code_versions[directory] = h.hexdigest()
+    return _code_versions[directory]
+
+class Uncacheable(Exception):
+    pass
+
+def canonical(value):
+    # JSON-able form of a constructor / run argument for hashing
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, range)):
+        return [canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, np.random.SeedSequence):
+        return {"entropy": canonical(value.entropy), "spawn_key": list(value.spawn_key)}
+    if isinstance(value, types.FunctionType):
+        return function_key(value)
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    if hasattr(value, "cache_key"):
+        return canonical(value.cache_key())
+    if isinstance(value, np.ndarray):
+        return hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if hasattr(value, "__dict__"):
+        state = {k: v for k, v in vars(value).items() if not k.startswith("_")}
+        return {"class": f"{type(value).__module__}.{type(value).__qualname__}", **canonical(state)}
+    raise Uncacheable(f"Can't key {type(value).__name__} values")
+
+def code_key(code):
+    # Bytecode, constants (nested functions included) and names of a code object
+    h = hashlib.sha256(code.co_code)
+    for const in code.co_consts:
+        h.update((code_key(const) if isinstance(const, types.CodeType) else repr(const)).encode())
+    h.update(repr(code.co_names).encode())
+    return h.hexdigest()
+
+def function_key(fn, _seen=None):
+    # A Python function (lambdas and closures too) is keyed by what it runs:
+    # its code, defaults, closure values and the globals it names, so two
+    # different functions never share a key just because they share a name
+    _seen = set() if _seen is None else _seen
+    if id(fn) in _seen:
+        return fn.__qualname__
+    _seen.add(id(fn))
+    closure = [cell.cell_contents for cell in fn.__closure__ or ()]
+    names = {}
+    for name in fn.__code__.co_names:
+        if name not in fn.__globals__:
+            continue
+        value = fn.__globals__[name]
+        if isinstance(value, types.ModuleType):
+            names[name] = value.__name__
+        elif isinstance(value, types.FunctionType):
+            names[name] = function_key(value, _seen)
+        else:
+            names[name] = canonical(value)
+    return {
+        "function": f"{fn.__module__}.{fn.__qualname__}",
+        "code": code_key(fn.__code__),
+        "defaults": canonical(fn.__defaults__),
+        "kwdefaults": canonical(fn.__kwdefaults__),
+        "closure": [function_key(v, _seen) if isinstance(v, types.FunctionType) else canonical(v) for v in closure],
+        "globals": names,
+    }
+
+def seed_key(rng):
+    if isinstance(rng, (int, np.integer, np.random.SeedSequence)):
+        return canonical(rng)
+    raise Uncacheable("Only runs seeded with an int or SeedSequence are cached")
+
+class RunCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, model, run_args):
+        if model.grid.turn != 0:
+            raise Uncacheable("The model has already been run")
+        config = dict(model.config)
+        cls = type(model)
+        desc = {
+            "model": f"{module_name(cls.__module__)}.{cls.__qualname__}",
+            "seed": seed_key(config.pop("rng", None)),
+            "config": canonical(config),
+            "run": canonical({k: run_args.get(k) for k in KEY_ARGS}),
+            "code": code_version(cls.__module__),
+        }
+        return hashlib.sha256(json.dumps(desc, sort_keys=True).encode()).hexdigest()[:32], desc
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def accepts(self, model):
+        try:
+            self.key(model, {})
+        except Uncacheable:
+            return False
+        return True
+
+    def fetch(self, model, columns, **run_args):
+        # Returns (rows of `columns`, entry directory), running the model on a miss.
+        # model.stop_reason / stop_turn are set as if it had run (termination.py)
+        key, desc = self.key(model, run_args)
+        entry = self.path(key)
+        if os.path.exists(os.path.join(entry, ENTRY)):
+            os.utime(os.path.join(entry, ENTRY))  # most recently used
+        else:
+            self._store(model, entry, desc, run_args)
+        run = open_run(entry)
+        model.stop_reason = run.meta.get("stop_reason")
+        model.stop_turn = run.meta.get("stop_turn")
+        rows = np.stack([run.metrics[c] for c in columns], axis=1) if len(run.metrics) else np.zeros((0, len(columns)))
+        kinds = [run.dtype[c].kind for c in columns]
+        data = [tuple(int(v) if k in "iub" else float(v) for v, k in zip(row, kinds)) for row in rows.tolist()]
+        return data, entry
+
+    def _store(self, model, entry, desc, run_args):
+        tmp = f"{entry}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        start = time.perf_counter()
+        model.run_simulation(**dict(run_args, write_csv=False, out_dir=tmp))
+        size = sum(os.path.getsize(os.path.join(tmp, n)) for n in os.listdir(tmp))
+        with open(os.path.join(tmp, ENTRY), "w") as f:
+            json.dump(dict(desc, seconds=time.perf_counter() - start, bytes=size), f, indent=1)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp)  # another process stored the same run first
+        self.evict()
+
+    def entries(self):
+        # [(last used, bytes, path)] oldest first
+        found = []
+        for name in os.listdir(self.directory):
+            meta = os.path.join(self.directory, name, ENTRY)
+            if os.path.exists(meta):
+                with open(meta) as f:
+                    size = json.load(f)["bytes"]
+                found.append((os.path.getmtime(meta), size, os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:  # never the newest
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+def copy_run(entry, out_dir):
+    # Copy a cached run's telemetry files to out_dir
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(entry):
+        if name != ENTRY:
+            shutil.copy2(os.path.join(entry, name), os.path.join(out_dir, name))
@@ -0,0 +1,139 @@
+import numpy as np
+from grid import EMPTY
+
+# Sequential movement phase, shared by the three models and the strips of
+# distributed.py. Agents move one at a time in a random order, each against
+# the live grid, so cells freed or taken by earlier movers count.
+#
+# A mover writes only within its sight (its cell and its target) and reads
+# within its sight, or twice that when it scores one-step empowerment. The
+# order is cut into runs in which no mover is near an earlier one of the
+# same run (independent_runs), so none can see what another changes. A run
+# of at least BATCH_MIN movers moves in a few array operations (move_batch)
+# with exactly the result of moving them one by one, random draws included.
+# Shorter runs go one agent at a time in plain Python over a dozen cells:
+# SugarGrid.candidates() gives the free visible cells (own first) as flat
+# indices with their sugar, and the best is picked in one pass, ties broken
+# at random. Multi-step empowerment (horizon > 1) always moves one by one.
+
+BATCH_MIN = 16
+
+def sequential_movement(model, weight=0.0, movers=None):
+    # weight: empowerment weight for agents with uses_empowerment (0 = sugar only),
+    # scored through model.cell_empowerment; movers: agent rows (default all living)
+    grid = model.grid
+    agents = model.agents
+    rng = model.rng
+    if movers is None:
+        movers = agents.living()
+    order = rng.permutation(movers)
+    n = grid.grid_size
+    xs, ys, sights = agents.x.tolist(), agents.y.tolist(), agents.sight.tolist()
+    empowered = agents.uses_empowerment.tolist() if weight else None
+    candidates, move = grid.candidates, grid.move_and_harvest
+    energy, x, y = agents.energy, agents.x, agents.y
+
+    grid.begin_moves()
+    try:
+        runs = independent_runs(model, order, weight)
+        for start, end in runs or [(0, len(order))]:
+            if runs and end - start >= BATCH_MIN:
+                move_batch(model, order[start:end], weight)
+                continue
+            for i in order[start:end].tolist():
+                cells, scores = candidates(xs[i], ys[i], sights[i])
+                if weight and empowered[i]:
+                    emp = model.cell_empowerment(cells, sights[i], cells[0])
+                    scores = [v + weight * e for v, e in zip(scores, emp)]
+                best = max(scores)
+                ties = [c for c, v in zip(cells, scores) if v == best]
+                cell = ties[rng.randrange(len(ties))]
+                energy[i] += move(cells[0], cell)
+                x[i], y[i] = divmod(cell, n)
+    finally:
+        grid.end_moves()
+
+def independent_runs(model, order, weight):
+    # (start, end) runs of the order in which no mover reads a cell an
+    # earlier mover of the same run may write; None if the order can't be cut
+    m = len(order)
+    if m < 2 * BATCH_MIN or (weight and getattr(model, "horizon", 1) > 1):
+        return None
+    agents = model.agents
+    n = model.grid.grid_size
+    sight = int(agents.sight[order].max())
+    read = 2 * sight if weight and agents.uses_empowerment[order].any() else sight
+    # blocks at least sight + read cells wide: movers in blocks that are not
+    # neighbours (on the torus) are further apart than that. With fewer
+    # blocks runs are too short to batch.
+    blocks = n // (sight + read)
+    if blocks < 2 * BATCH_MIN:
+        return None
+    bx = agents.x[order].astype(np.int64) * blocks // n
+    by = agents.y[order].astype(np.int64) * blocks // n
+    position = np.arange(m)
+    keys = np.sort((bx * blocks + by) * m + position)
+    # latest earlier mover in the same or a neighbouring block
+    last = np.full(m, -1)
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            block = ((bx + ox) % blocks) * blocks + (by + oy) % blocks
+            query = block * m + position
+            k = keys[np.maximum(np.searchsorted(keys, query) - 1, 0)]
+            last = np.maximum(last, np.where((k < query) & (k // m == block), k % m, -1))
+    runs = []
+    start = 0
+    for j, i in zip(np.flatnonzero(last >= 0).tolist(), last[last >= 0].tolist()):
+        if i >= start:
+            runs.append((start, j))
+            start = j
+    runs.append((start, m))
+    return runs
+
+def move_batch(model, rows, weight):
+    # Moves movers that can't see each other's changes, all at once
+    grid = model.grid
+    agents = model.agents
+    n = grid.grid_size
+    px = agents.x[rows].astype(np.int64)
+    py = agents.y[rows].astype(np.int64)
+    sight = agents.sight[rows].astype(np.int64)
+    top = int(sight.max())
+    dx, dy = grid.stencil(top)
+    arm = (dx == 0) & (dy != 0)
+    d = dy[arm]
+    near = grid.stencil_radius(top)[arm] <= sight[:, None]
+    # candidates in the order SugarGrid.candidates() lists them: own cell, row arm, column arm
+    here = px * n + py
+    cells = np.concatenate([here[:, None], px[:, None] * n + (py[:, None] + d) % n,
+                            ((px[:, None] + d) % n) * n + py[:, None]], axis=1)
+    ok = np.concatenate([np.ones((len(rows), 1), dtype=bool), near, near], axis=1)
+    ok[:, 1:] &= grid.occupancy.reshape(-1)[cells[:, 1:]] == EMPTY
+    profiler = getattr(model, "profiler", None)
+    if profiler is not None:
+        profiler.count("candidates", int(ok.sum()))
+
+    score = grid.sugar_at(*np.divmod(cells, n)).astype(np.float64)
+    if weight:
+        empowered = np.flatnonzero(agents.uses_empowerment[rows])
+        for s in np.unique(sight[empowered]).tolist():
+            r = empowered[sight[empowered] == s]
+            valid = ok[r]
+            emp = np.zeros(valid.shape)
+            emp[valid] = model.cell_empowerment(cells[r][valid], s, np.broadcast_to(here[r, None], valid.shape)[valid])
+            score[r] += weight * emp
+    score = np.where(ok, score, -np.inf)
+    ties = score == score.max(axis=1, keepdims=True)
+    # k-th tie with the draw each mover would make in turn (BlockRNG.randrange)
+    k = (np.array(model.rng.randoms(len(rows))) * ties.sum(axis=1)).astype(np.int64)
+    pick = np.argmax(np.cumsum(ties, axis=1) > k[:, None], axis=1)
+    target = cells[np.arange(len(rows)), pick]
+
+    tx, ty = np.divmod(target, n)
+    moved = target != here
+    ids = grid.occupancy[px[moved], py[moved]]
+    grid.vacate(px[moved], py[moved])
+    grid.place(tx[moved], ty[moved], ids)
+    agents.energy[rows] += grid.harvest(tx, ty)
+    agents.x[rows] = tx
+    agents.y[rows] = ty
@@ -0,0 +1,99 @@
+import importlib
+import numpy as np
+from checkpoint import maybe_checkpoint
+from telemetry import TelemetryWriter
+from metrics import Metrics
+from termination import Stopper, fill_remaining
+from lineage import attach_lineage
+from runcache import copy_run
+
+# The run loop behind the three models' run_simulation(), and the one
+# registry of models by name (cli.py, sweep.py, benchmark.py).
+# A model brings its phases, its per-turn columns (its METRICS, returned as
+# (turn, *values) rows and read back from the run cache) and an export
+# function that writes its CSV files from those rows. simulate() adds the
+# rest: run cache, extra metrics, early stopping, telemetry, checkpoints,
+# profiling and the lineage log.
+
+MODELS = {
+    "Sugarscape": "sugarscape1",
+    "EvolSugarscape": "sugarscape2",
+    "EmpoweredSugarscape": "sugarscape3",
+}
+
+def load_model(name):
+    # (module, class) of a model in MODELS
+    if name not in MODELS:
+        raise ValueError(f"Unknown model {name!r}, expected one of {sorted(MODELS)}")
+    module = importlib.import_module(MODELS[name])
+    return module, getattr(module, name)
+
+def simulate(model, columns, export, turns, write_csv=True, out_dir=None, snapshot_every=None, snapshot_turns=None,
+             checkpoint_every=None, checkpoint_dir=None, profiler=None, metrics=None, cache=None, stop=None, lineage=None):
+    # columns: the model's {column: spec} METRICS; export(data): writes its CSV files (when write_csv);
+    # snapshot_turns: None for models whose run_simulation doesn't take it (see runcache.fetch);
+    # the other arguments are run_simulation's
+    if cache is not None and lineage is None and cache.accepts(model):
+        run_args = {"turns": turns, "snapshot_every": snapshot_every, "checkpoint_every": checkpoint_every,
+                    "checkpoint_dir": checkpoint_dir, "profiler": profiler, "metrics": metrics, "stop": stop}
+        if snapshot_turns is not None:
+            run_args["snapshot_turns"] = snapshot_turns
+        data, entry = cache.fetch(model, ["Turn", *columns], **run_args)
+        if out_dir is not None:
+            copy_run(entry, out_dir)
+        if write_csv and export is not None:
+            export(data)
+        return data
+
+    data = []
+    model.metrics = Metrics(dict(columns, **(metrics or {})))
+    model.stop_reason = model.stop_turn = None
+    stopper = Stopper(stop) if stop else None
+    if lineage is not None:
+        attach_lineage(model, lineage)
+    telemetry = None
+    if out_dir is not None:
+        # streaming copy of the per-turn data plus grid snapshots (see telemetry.py)
+        telemetry = TelemetryWriter(out_dir, [("Turn", np.int64)] + model.metrics.columns,
+                                    snapshot_every=snapshot_every, snapshot_turns=snapshot_turns or (),
+                                    resume_turn=model.grid.turn)
+    if profiler is not None:
+        profiler.attach(model)
+    # looked up after attach, so the profiler's wrapper is the one called
+    consumption = getattr(model, "consumption_phase_and_procreation", None) or model.consumption_phase
+
+    # Runs up to turn `turns`, continuing from the grid's turn counter (0 for a
+    # fresh model, the saved turn for one loaded with checkpoint.load_checkpoint)
+    for t in range(model.grid.turn+1, turns+1):
+        model.sugar_growth_phase()
+        model.agent_movement_phase()
+        consumption()
+        model.agents.maybe_compact(t)
+
+        row = model.metrics.measure(model)
+        data.append((t, *(row[c] for c in columns)))
+        if telemetry is not None:
+            telemetry.record((t, *row.values()))
+            if telemetry.wants_snapshot(t):
+                living = model.agents.living()
+                telemetry.snapshot(t, model.grid.snapshot(), model.agents.x[living], model.agents.y[living])
+
+        maybe_checkpoint(model, t, checkpoint_every, checkpoint_dir)
+        if stopper is not None:
+            model.stop_reason = stopper.check(model)
+            if model.stop_reason is not None:
+                model.stop_turn = t
+                fill_remaining(model, data, row, telemetry, t, turns)
+                break
+
+    if profiler is not None:
+        profiler.finish()
+    if getattr(model, "lineage", None) is not None:
+        model.lineage.flush()
+    if telemetry is not None:
+        if model.stop_reason is not None:
+            telemetry.meta.update(stop_reason=model.stop_reason, stop_turn=model.stop_turn)
+        telemetry.close()
+    if write_csv and export is not None:
+        export(data)
+    return data
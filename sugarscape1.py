@@ -1,7 +1,12 @@
-import random
-import csv
-import numpy as np
-import matplotlib.pyplot as plt
+from grid import SugarGrid
+from agents import AgentStore, COMPACT_EVERY
+from rng import as_rng
+from synchronous import synchronous_movement
+from sequential import sequential_movement
+from telemetry import open_run, write_metrics_csv, write_positions_csv, write_sugar_csv
+from runcache import RunCache
+from simulation import simulate
+from analysis import is_telemetry_dir, load_series, load_snapshots
 
 # Parameters for the simulation
 GRID_SIZE = 20
@@ -9,136 +14,93 @@ NUM_AGENTS = 20
 INITIAL_ENERGY = 10
 SIGHT = 3
 TURNS = 500
-
-class Agent:
-    def __init__(self, x, y, energy=INITIAL_ENERGY, sight=SIGHT):
-        self.x = x
-        self.y = y
-        self.energy = energy
-        self.sight = sight
-        self.alive = True
+SCHEDULE = "sequential" # or "synchronous" (see synchronous.py)
+SNAPSHOT_TURNS = (1, 50, 500)
+OUT_DIR = "task1_output"
+CHECKPOINT_DIR = "task1_checkpoints"
+SEED = 1 # seed of the __main__ run
+METRICS = {"TotalEnergy": "sum:energy"} # per-turn columns, see metrics.py
 
 class Sugarscape:
-    def __init__(self, grid_size=GRID_SIZE):
+    def __init__(self, grid_size=GRID_SIZE, num_agents=NUM_AGENTS, initial_energy=INITIAL_ENERGY, sight=SIGHT,
+                 compact_every=COMPACT_EVERY, lazy_regrowth=False, landscape=None, schedule=SCHEDULE, rng=None):
+        self.config = {k: v for k, v in locals().items() if k != "self"} # constructor arguments (runcache.py)
         self.grid_size = grid_size
-        self.capacity = [[x+y for y in range(grid_size)] for x in range(grid_size)]
-        self.sugar = [[self.capacity[x][y] for y in range(grid_size)] for x in range(grid_size)]
-        self.agents = []
+        self.num_agents = num_agents
+        self.initial_energy = initial_energy
+        self.sight = sight
+        self.grid = SugarGrid(grid_size, lazy=lazy_regrowth, landscape=landscape)
+        self.capacity = self.grid.capacity
+        self.agents = AgentStore(compact_every=compact_every)
+        self.schedule = schedule
+        self.rng = as_rng(rng) # seed, Generator or BlockRNG; each model owns its stream
         self.place_agents()
 
     def place_agents(self):
-        positions = set()
-        while len(positions) < NUM_AGENTS:
-            x = random.randint(0, self.grid_size-1)
-            y = random.randint(0, self.grid_size-1)
-            if (x,y) not in positions:
-                positions.add((x,y))
-                self.agents.append(Agent(x, y))
+        while len(self.agents) < self.num_agents:
+            x = self.rng.randint(0, self.grid_size-1)
+            y = self.rng.randint(0, self.grid_size-1)
+            if self.grid.is_free(x, y):
+                i = self.agents.add(x, y, self.initial_energy, self.sight)
+                self.grid.place(x, y, self.agents.id[i])
 
     def wrap(self, coord):
-        return coord % self.grid_size
+        return self.grid.wrap(coord)
 
     def sugar_growth_phase(self):
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                if self.sugar[x][y] < self.capacity[x][y]:
-                    self.sugar[x][y] += 1
+        self.grid.grow()
 
     def visible_locations(self, agent):
-        visible = [(agent.x, agent.y)]
-        for i in range(1, agent.sight+1):
-            visible.append((self.wrap(agent.x+i), agent.y))
-            visible.append((self.wrap(agent.x-i), agent.y))
-            visible.append((agent.x, self.wrap(agent.y+i)))
-            visible.append((agent.x, self.wrap(agent.y-i)))
-        visible = list(set(visible))
-        return visible
+        xs, ys = self.grid.visible(agent.x, agent.y, agent.sight)
+        return list(zip(xs.tolist(), ys.tolist()))
 
     def agent_movement_phase(self):
-        random.shuffle(self.agents)
-        occupied = {(a.x,a.y) for a in self.agents if a.alive}
-
-        for agent in self.agents:
-            if not agent.alive:
-                continue
-            vis_locs = self.visible_locations(agent)
-            # Candidate locations can't be currently occupied by another agent (except current)
-            candidates = [(lx,ly) for (lx,ly) in vis_locs if (lx,ly) not in occupied or (lx,ly) == (agent.x,agent.y)]
-            if not candidates:
-                continue
-            # Choose location with max sugar
-            best_sugar = max(self.sugar[lx][ly] for (lx,ly) in candidates)
-            best_candidates = [(lx,ly) for (lx,ly) in candidates if self.sugar[lx][ly] == best_sugar]
-            new_x, new_y = random.choice(best_candidates)
-            occupied.remove((agent.x, agent.y))
-            agent.x, agent.y = new_x, new_y
-            occupied.add((agent.x, agent.y))
-            # consume sugar
-            agent.energy += self.sugar[new_x][new_y]
-            self.sugar[new_x][new_y] = 0
+        if self.schedule == "synchronous":
+            synchronous_movement(self)
+            return
+        # Each agent in turn moves to its best free visible cell, ties broken
+        # at random, and takes its sugar (see sequential.py)
+        sequential_movement(self)
 
     def consumption_phase(self):
-        for agent in self.agents:
-            if agent.alive:
-                agent.energy -= 1
-                if agent.energy <= 0:
-                    agent.alive = False
-
-    def run_simulation(self, turns=TURNS):
+        living = self.agents.living()
+        self.agents.energy[living] -= 1
+        self.agents.alive[living] = self.agents.energy[living] > 0
+        dead = living[~self.agents.alive[living]]
+        self.grid.vacate(self.agents.x[dead], self.agents.y[dead])
+
+    def run_simulation(self, turns=TURNS, out_dir=OUT_DIR, snapshot_every=None, snapshot_turns=SNAPSHOT_TURNS, write_csv=True,
+                       checkpoint_every=None, checkpoint_dir=CHECKPOINT_DIR, profiler=None, metrics=None, cache=None, stop=None):
         # For Task 2 data collection
-        energy_data = []
-        pos_data = {}
-        sugar_data = {}
-
-        for t in range(1, turns+1):
-            self.sugar_growth_phase()
-            self.agent_movement_phase()
-            self.consumption_phase()
-
-            # Collect data
-            living_agents = [a for a in self.agents if a.alive]
-            total_energy = sum(a.energy for a in living_agents)
-            energy_data.append((t,total_energy))
-
-            if t in [1,50,500]:
-                pos_data[t] = [(a.x,a.y) for a in living_agents]
-                sugar_snapshot = [[self.sugar[x][y] for y in range(self.grid_size)] for x in range(self.grid_size)]
-                sugar_data[t] = sugar_snapshot
-
-        # Write CSV data
-        with open("task1_energy_data.csv","w",newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Turn","TotalEnergy"])
-            writer.writerows(energy_data)
-
-        with open("task1_agent_positions.csv","w",newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Turn","AgentX","AgentY"])
-            for t in pos_data:
-                for (x,y) in pos_data[t]:
-                    writer.writerow([t,x,y])
-
-        with open("task1_sugar_levels.csv","w",newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Turn","X","Y","Sugar"])
-            for t in sugar_data:
-                for x in range(self.grid_size):
-                    for y in range(self.grid_size):
-                        writer.writerow([t,x,y,sugar_data[t][x][y]])
+        # metrics: extra {column: "stat:field@group"} measured each turn (telemetry and self.metrics)
+        # cache: a runcache.RunCache; a seeded run already in it is read back instead of simulated
+        # stop: detectors (or their names) that end the run early, see termination.py
+        # Per-turn energy and sugar/position snapshots stream to out_dir (see telemetry.py);
+        # the task1_*.csv files are exported from it at the end when write_csv is set.
+        # The loop itself is simulation.simulate.
+        export = (lambda data: export_csv(out_dir)) if out_dir is not None else None
+        return simulate(self, METRICS, export, turns, write_csv=write_csv, out_dir=out_dir, snapshot_every=snapshot_every,
+                        snapshot_turns=snapshot_turns, checkpoint_every=checkpoint_every, checkpoint_dir=checkpoint_dir,
+                        profiler=profiler, metrics=metrics, cache=cache, stop=stop)
+
+def export_csv(out_dir=OUT_DIR):
+    # Write the Task 1 CSV files from a telemetry directory
+    run = open_run(out_dir)
+    write_metrics_csv(run, "task1_energy_data.csv")
+    write_positions_csv(run, "task1_agent_positions.csv")
+    write_sugar_csv(run, "task1_sugar_levels.csv")
 
 # Perform analysis after simulation
-def analyze_results():
+def analyze_results(source=None):
+    import matplotlib.pyplot as plt # imported here so headless runs never load it
+    # source: a telemetry directory (memory-mapped) or None for the task1_*.csv files
+    if source is not None and not is_telemetry_dir(source):
+        source = None
+
     # Load total energy data
-    turns = []
-    energies = []
-    with open("task1_energy_data.csv","r") as f:
-        reader = csv.reader(f)
-        next(reader) # skip header
-        for row in reader:
-            t = int(row[0])
-            E = float(row[1])
-            turns.append(t)
-            energies.append(E)
+    series = load_series(source if source is not None else "task1_energy_data.csv")
+    turns = series["Turn"]
+    energies = series["TotalEnergy"]
 
     # Plot total energy over time
     plt.figure(figsize=(8,6))
@@ -150,49 +112,26 @@ def analyze_results():
     plt.savefig("task2_total_energy_plot.png")
     plt.close()
 
-    # Load agent positions
-    positions_by_turn = {1:[], 50:[], 500:[]}
-    with open("task1_agent_positions.csv","r") as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            t = int(row[0])
-            if t in positions_by_turn:
-                x = int(row[1])
-                y = int(row[2])
-                positions_by_turn[t].append((x,y))
-
-    # Load sugar levels
-    sugar_by_turn = {1:np.zeros((GRID_SIZE,GRID_SIZE)),
-                     50:np.zeros((GRID_SIZE,GRID_SIZE)),
-                     500:np.zeros((GRID_SIZE,GRID_SIZE))}
-    with open("task1_sugar_levels.csv","r") as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            t = int(row[0])
-            if t in sugar_by_turn:
-                x = int(row[1])
-                y = int(row[2])
-                s_val = float(row[3])
-                sugar_by_turn[t][x,y] = s_val
-
-    # Visualizations for turns 1, 50, 500
-    for t in [1, 50, 500]:
+    # Load sugar levels and agent positions for every snapshot turn
+    snap_turns, sugar_grids, positions_by_turn = load_snapshots(source, "task1_sugar_levels.csv", "task1_agent_positions.csv")
+    sugar_by_turn = dict(zip(snap_turns, sugar_grids))
+    grid_size = sugar_grids.shape[-1] if len(snap_turns) else GRID_SIZE
+
+    # Visualizations for each snapshot turn (1, 50, 500 by default)
+    for t in snap_turns:
         fig, ax = plt.subplots(figsize=(6,6))
         im = ax.imshow(sugar_by_turn[t].T, origin="lower", cmap="YlOrBr", interpolation="nearest")
         plt.colorbar(im, ax=ax, label="Sugar level")
 
         # Plot agent positions
-        xs = [pos[0] for pos in positions_by_turn[t]]
-        ys = [pos[1] for pos in positions_by_turn[t]]
-        ax.scatter(xs, ys, c='red', edgecolors='black', label='Agents')
+        pos = positions_by_turn[t]
+        ax.scatter(pos[:, 0], pos[:, 1], c='red', edgecolors='black', label='Agents')
 
         ax.set_title(f"Turn {t} - Agents and Sugar Distribution")
-        ax.set_xlim(-0.5, GRID_SIZE-0.5)
-        ax.set_ylim(-0.5, GRID_SIZE-0.5)
-        ax.set_xticks(range(0,GRID_SIZE,5))
-        ax.set_yticks(range(0,GRID_SIZE,5))
+        ax.set_xlim(-0.5, grid_size-0.5)
+        ax.set_ylim(-0.5, grid_size-0.5)
+        ax.set_xticks(range(0,grid_size,5))
+        ax.set_yticks(range(0,grid_size,5))
         plt.legend()
         plt.savefig(f"task2_visualization_turn_{t}.png")
         plt.close()
@@ -200,11 +139,11 @@ def analyze_results():
     print("Analysis completed. Plots saved as PNG files.")
 
 if __name__ == "__main__":
-    # Run the simulation for Task 1
-    s = Sugarscape()
-    s.run_simulation()
+    # Run the simulation for Task 1 (read back from the run cache if unchanged)
+    s = Sugarscape(rng=SEED)
+    s.run_simulation(cache=RunCache())
     print("Task 1 simulation completed. CSV files saved.")
 
     # Perform the analysis for Task 2
-    analyze_results()
+    analyze_results(OUT_DIR)
     print("Task 2 analysis completed.")
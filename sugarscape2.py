@@ -1,161 +1,100 @@
-import random
 import csv
-import statistics
-import matplotlib.pyplot as plt
+from grid import SugarGrid
+from agents import AgentStore, COMPACT_EVERY
+from rng import as_rng
+from synchronous import synchronous_movement
+from sequential import sequential_movement
+from procreation import consume_and_procreate
+from runcache import RunCache
+from simulation import simulate
+from analysis import load_series
 
 # Parameters
 GRID_SIZE = 20
 NUM_AGENTS = 20
 INITIAL_ENERGY = 10
 TURNS = 500
-
-class Agent:
-    def __init__(self, x, y, energy=INITIAL_ENERGY, sight=None):
-        if sight is None:
-            self.sight = random.randint(2,5) # random initial sight between 2 and 5
-        else:
-            self.sight = sight
-        self.x = x
-        self.y = y
-        self.energy = energy
-        self.alive = True
+SCHEDULE = "sequential" # or "synchronous" (see synchronous.py)
+CHECKPOINT_DIR = "task3_checkpoints"
+PROCREATION_THRESHOLD = 20
+SEED = 1 # seed of the __main__ run
+SIGHT_RANGE = (2, 5) # initial sight is drawn from, and mutation stays within, this range
+METRICS = {"NumAgents": "count", "AvgSight": "mean:sight"} # per-turn columns, see metrics.py
 
 class EvolSugarscape:
-    def __init__(self, grid_size=GRID_SIZE):
+    def __init__(self, grid_size=GRID_SIZE, num_agents=NUM_AGENTS, initial_energy=INITIAL_ENERGY,
+                 procreation_threshold=PROCREATION_THRESHOLD, sight_range=SIGHT_RANGE,
+                 compact_every=COMPACT_EVERY, lazy_regrowth=False, landscape=None, schedule=SCHEDULE, rng=None):
+        self.config = {k: v for k, v in locals().items() if k != "self"} # constructor arguments (runcache.py)
         self.grid_size = grid_size
-        self.capacity = [[x+y for y in range(grid_size)] for x in range(grid_size)]
-        self.sugar = [[self.capacity[x][y] for y in range(grid_size)] for x in range(grid_size)]
-        self.agents = []
+        self.num_agents = num_agents
+        self.initial_energy = initial_energy
+        self.procreation_threshold = procreation_threshold
+        self.sight_range = sight_range
+        self.grid = SugarGrid(grid_size, lazy=lazy_regrowth, landscape=landscape)
+        self.capacity = self.grid.capacity
+        self.agents = AgentStore(compact_every=compact_every)
+        self.schedule = schedule
+        self.rng = as_rng(rng) # seed, Generator or BlockRNG; each model owns its stream
+        self.lineage = None # births and deaths log, kept by run_simulation(lineage=...)
         self.place_agents()
 
     def place_agents(self):
-        positions = set()
-        while len(positions) < NUM_AGENTS:
-            x = random.randint(0, self.grid_size-1)
-            y = random.randint(0, self.grid_size-1)
-            if (x,y) not in positions:
-                positions.add((x,y))
-                self.agents.append(Agent(x, y))
+        while len(self.agents) < self.num_agents:
+            x = self.rng.randint(0, self.grid_size-1)
+            y = self.rng.randint(0, self.grid_size-1)
+            if self.grid.is_free(x, y):
+                i = self.agents.add(x, y, self.initial_energy, self.rng.randint(*self.sight_range)) # random initial sight between 2 and 5 by default
+                self.grid.place(x, y, self.agents.id[i])
 
     def wrap(self, coord):
-        return coord % self.grid_size
+        return self.grid.wrap(coord)
 
     def sugar_growth_phase(self):
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                if self.sugar[x][y] < self.capacity[x][y]:
-                    self.sugar[x][y] += 1
+        self.grid.grow()
 
     def visible_locations(self, agent):
-        visible = [(agent.x, agent.y)]
-        for i in range(1, agent.sight+1):
-            visible.append((self.wrap(agent.x+i), agent.y))
-            visible.append((self.wrap(agent.x-i), agent.y))
-            visible.append((agent.x, self.wrap(agent.y+i)))
-            visible.append((agent.x, self.wrap(agent.y-i)))
-        visible = list(set(visible))
-        return visible
+        xs, ys = self.grid.visible(agent.x, agent.y, agent.sight)
+        return list(zip(xs.tolist(), ys.tolist()))
 
     def agent_movement_phase(self):
-        random.shuffle(self.agents)
-        occupied = {(a.x,a.y) for a in self.agents if a.alive}
-
-        for agent in self.agents:
-            if not agent.alive:
-                continue
-            vis_locs = self.visible_locations(agent)
-            candidates = [(lx,ly) for (lx,ly) in vis_locs if (lx,ly) not in occupied or (lx,ly) == (agent.x,agent.y)]
-            if not candidates:
-                continue
-            best_sugar = max(self.sugar[lx][ly] for (lx,ly) in candidates)
-            best_candidates = [(lx,ly) for (lx,ly) in candidates if self.sugar[lx][ly] == best_sugar]
-            new_x, new_y = random.choice(best_candidates)
-            occupied.remove((agent.x, agent.y))
-            agent.x, agent.y = new_x, new_y
-            occupied.add((agent.x, agent.y))
-            # consume sugar
-            agent.energy += self.sugar[new_x][new_y]
-            self.sugar[new_x][new_y] = 0
+        if self.schedule == "synchronous":
+            synchronous_movement(self)
+            return
+        # Each agent in turn moves to its best free visible cell, ties broken
+        # at random, and takes its sugar (see sequential.py)
+        sequential_movement(self)
 
     def consumption_phase_and_procreation(self):
-        # Energy consumption
-        occupied = {(a.x,a.y) for a in self.agents if a.alive}
-        new_agents = []
-        for agent in self.agents:
-            if agent.alive:
-                agent.energy -= 1
-                if agent.energy <= 0:
-                    agent.alive = False
-                    continue
-
-                # Check procreation
-                if agent.energy > 20:
-                    # try to find empty neighbor
-                    neighbors = [(agent.x+1, agent.y),
-                                 (agent.x-1, agent.y),
-                                 (agent.x, agent.y+1),
-                                 (agent.x, agent.y-1)]
-                    neighbors = [(self.wrap(x),self.wrap(y)) for (x,y) in neighbors]
-                    empty_neighbors = [n for n in neighbors if n not in occupied]
-                    if empty_neighbors:
-                        child_x, child_y = random.choice(empty_neighbors)
-                        # split energy
-                        child_energy = agent.energy // 2
-                        agent.energy = agent.energy - child_energy
-                        child_sight = agent.sight
-                        # mutation
-                        m = random.randint(0,10)
-                        if m == 0 and child_sight > 2:
-                            child_sight -= 1
-                        elif m == 1 and child_sight < 5:
-                            child_sight += 1
-
-                        child = Agent(child_x, child_y, energy=child_energy, sight=child_sight)
-                        new_agents.append(child)
-                        occupied.add((child_x, child_y))
-
-        self.agents.extend(new_agents)
-
-    def run_simulation(self, turns=TURNS):
+        # Energy consumption, deaths and births in bulk (see procreation.py)
+        consume_and_procreate(self)
+
+    def run_simulation(self, turns=TURNS, write_csv=True, out_dir=None, snapshot_every=None,
+                       checkpoint_every=None, checkpoint_dir=CHECKPOINT_DIR, profiler=None, metrics=None, cache=None, stop=None, lineage=None):
         # Track number of agents and sight distribution each turn
-        data = []
-        for t in range(1, turns+1):
-            self.sugar_growth_phase()
-            self.agent_movement_phase()
-            self.consumption_phase_and_procreation()
-
-            living_agents = [a for a in self.agents if a.alive]
-            count = len(living_agents)
-            if count > 0:
-                sights = [a.sight for a in living_agents]
-                avg_sight = statistics.mean(sights)
-            else:
-                avg_sight = 0
-
-            data.append((t, count, avg_sight))
-
-        # Write CSV
-        with open("task3_evolution_data.csv","w",newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Turn","NumAgents","AvgSight"])
-            writer.writerows(data)
+        # metrics: extra {column: "stat:field@group"} measured each turn (telemetry and self.metrics)
+        # cache: a runcache.RunCache; a seeded run already in it is read back instead of simulated
+        # stop: detectors (or their names) that end the run early, see termination.py
+        # lineage: a lineage.Lineage or directory to log births and deaths to; such runs bypass the cache
+        # out_dir: optional streaming copy of the per-turn data plus grid snapshots.
+        # The loop itself is simulation.simulate.
+        return simulate(self, METRICS, export_csv, turns, write_csv=write_csv, out_dir=out_dir, snapshot_every=snapshot_every,
+                        checkpoint_every=checkpoint_every, checkpoint_dir=checkpoint_dir, profiler=profiler,
+                        metrics=metrics, cache=cache, stop=stop, lineage=lineage)
+
+def export_csv(data, path="task3_evolution_data.csv"):
+    with open(path,"w",newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Turn","NumAgents","AvgSight"])
+        writer.writerows(data)
 
 def plot_csv(file):
-    # Read data from the CSV file
-    turns = []
-    num_agents = []
-    avg_sight = []
-
-    with open(file,"r") as f:
-        reader = csv.reader(f)
-        next(reader)  # skip header
-        for row in reader:
-            t = int(row[0])
-            n = int(row[1])
-            s = float(row[2])
-            turns.append(t)
-            num_agents.append(n)
-            avg_sight.append(s)
+    import matplotlib.pyplot as plt # imported here so headless runs never load it
+    # Read data from the CSV file (or a telemetry directory) in one pass
+    series = load_series(file)
+    turns = series["Turn"]
+    num_agents = series["NumAgents"]
+    avg_sight = series["AvgSight"]
 
     # Plot average sight over time
     plt.figure(figsize=(8,6))
@@ -181,7 +120,8 @@ def plot_csv(file):
 
 
 if __name__ == "__main__":
-    s = EvolSugarscape()
-    s.run_simulation()
+    # read back from the run cache if nothing changed
+    s = EvolSugarscape(rng=SEED)
+    s.run_simulation(cache=RunCache())
     print("Task 3 simulation completed. Data saved to CSV.")
     plot_csv("task3_evolution_data.csv")
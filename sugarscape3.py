@@ -1,212 +1,141 @@
-import random
 import csv
-import statistics
-import matplotlib.pyplot as plt
+from grid import SugarGrid
+from empowerment import Reach
+from agents import AgentStore, COMPACT_EVERY
+from rng import as_rng
+from synchronous import synchronous_movement
+from sequential import sequential_movement
+from procreation import consume_and_procreate
+from runcache import RunCache
+from simulation import simulate
+from analysis import load_series
+import numpy as np
 
 # Parameters
 GRID_SIZE = 20
 NUM_AGENTS = 20
 INITIAL_ENERGY = 10
 TURNS = 500
-
-class Agent:
-    def __init__(self, x, y, energy=INITIAL_ENERGY, sight=None, uses_empowerment=None):
-        if sight is None:
-            sight = random.randint(2,5)
-        if uses_empowerment is None:
-            uses_empowerment = (random.random() < 0.5) # 50% chance
-        self.x = x
-        self.y = y
-        self.energy = energy
-        self.sight = sight
-        self.alive = True
-        self.uses_empowerment = uses_empowerment
+SCHEDULE = "sequential" # or "synchronous" (see synchronous.py)
+CHECKPOINT_DIR = "task4_checkpoints"
+PROCREATION_THRESHOLD = 20
+SEED = 1 # seed of the __main__ run
+SIGHT_RANGE = (2, 5) # initial sight is drawn from, and mutation stays within, this range
+EMPOWERMENT_RATIO = 0.5 # chance that an initial agent uses empowerment
+EMPOWERMENT_WEIGHT = 0.5 # alpha in sugar + alpha * empowerment
+HORIZON = 1 # moves looked ahead by empowerment; 1 = one-step cross count
+# per-turn columns, see metrics.py
+METRICS = {"TotalAgents": "count", "EmpAgents": "count@emp", "NonEmpAgents": "count@non_emp",
+           "AvgEmpEnergy": "mean:energy@emp", "AvgNonEmpEnergy": "mean:energy@non_emp"}
 
 class EmpoweredSugarscape:
-    def __init__(self, grid_size=GRID_SIZE):
+    def __init__(self, grid_size=GRID_SIZE, num_agents=NUM_AGENTS, initial_energy=INITIAL_ENERGY,
+                 procreation_threshold=PROCREATION_THRESHOLD, empowerment_weight=EMPOWERMENT_WEIGHT,
+                 sight_range=SIGHT_RANGE, empowerment_ratio=EMPOWERMENT_RATIO,
+                 compact_every=COMPACT_EVERY, lazy_regrowth=False, landscape=None, schedule=SCHEDULE, horizon=HORIZON, rng=None):
+        self.config = {k: v for k, v in locals().items() if k != "self"} # constructor arguments (runcache.py)
         self.grid_size = grid_size
-        self.capacity = [[x+y for y in range(grid_size)] for x in range(grid_size)]
-        self.sugar = [[self.capacity[x][y] for y in range(grid_size)] for x in range(grid_size)]
-        self.agents = []
+        self.num_agents = num_agents
+        self.initial_energy = initial_energy
+        self.procreation_threshold = procreation_threshold
+        self.sight_range = sight_range
+        self.empowerment_ratio = empowerment_ratio
+        self.empowerment_weight = empowerment_weight
+        self.grid = SugarGrid(grid_size, track_sights=range(sight_range[0], sight_range[1]+1), lazy=lazy_regrowth, landscape=landscape)
+        self.capacity = self.grid.capacity
+        self.agents = AgentStore(compact_every=compact_every)
+        self.schedule = schedule
+        self.rng = as_rng(rng) # seed, Generator or BlockRNG; each model owns its stream
+        self.lineage = None # births and deaths log, kept by run_simulation(lineage=...)
+        self.horizon = horizon
+        self.reach = Reach(self.grid, horizon)
         self.place_agents()
 
     def place_agents(self):
-        positions = set()
-        while len(positions) < NUM_AGENTS:
-            x = random.randint(0, self.grid_size-1)
-            y = random.randint(0, self.grid_size-1)
-            if (x,y) not in positions:
-                positions.add((x,y))
-                self.agents.append(Agent(x, y))
+        while len(self.agents) < self.num_agents:
+            x = self.rng.randint(0, self.grid_size-1)
+            y = self.rng.randint(0, self.grid_size-1)
+            if self.grid.is_free(x, y):
+                sight = self.rng.randint(*self.sight_range)
+                uses_empowerment = (self.rng.random() < self.empowerment_ratio) # 50% chance by default
+                i = self.agents.add(x, y, self.initial_energy, sight, uses_empowerment)
+                self.grid.place(x, y, self.agents.id[i])
 
     def wrap(self, coord):
-        return coord % self.grid_size
+        return self.grid.wrap(coord)
 
     def sugar_growth_phase(self):
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                if self.sugar[x][y] < self.capacity[x][y]:
-                    self.sugar[x][y] += 1
+        self.grid.grow()
 
     def visible_locations(self, agent):
-        visible = [(agent.x, agent.y)]
-        for i in range(1, agent.sight+1):
-            visible.append((self.wrap(agent.x+i), agent.y))
-            visible.append((self.wrap(agent.x-i), agent.y))
-            visible.append((agent.x, self.wrap(agent.y+i)))
-            visible.append((agent.x, self.wrap(agent.y-i)))
-        visible = list(set(visible))
-        return visible
-
-    def empowerment(self, x, y, sight, occupied):
+        xs, ys = self.grid.visible(agent.x, agent.y, agent.sight)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def empowerment(self, x, y, sight, vacated=None):
         # Compute how many moves are possible next turn from (x,y)
         # Next turn, the agent can choose from visible locations again.
         # For approximation, we just count how many distinct locations are visible next turn that are not occupied.
-        vis = []
-        vis.append((x,y))
-        for i in range(1, sight+1):
-            vis.append((self.wrap(x+i),y))
-            vis.append((self.wrap(x-i),y))
-            vis.append((x,self.wrap(y+i)))
-            vis.append((x,self.wrap(y-i)))
-        vis = set(vis)
         # Consider that no other agent moves now, so we just count how many are free
-        free_spots = [loc for loc in vis if loc not in occupied or loc == (x,y)]
-        return len(free_spots)
+        # (vacated is the mover's own cell, which it will have left).
+        # The grid keeps free-cell counts per row/column window, so this is a lookup;
+        # horizon > 1 counts the cells reachable in that many moves (empowerment.py).
+        if self.horizon > 1:
+            return self.reach.counts(x, y, sight, vacated).reshape(np.shape(x))
+        return self.grid.empowerment(x, y, sight, vacated)
+
+    def cell_empowerment(self, cells, sight, here):
+        # empowerment() of a mover's candidate cells, as flat indices (see
+        # SugarGrid.candidates), with the mover's own cell `here` vacated;
+        # a list for a list of cells, else an array
+        if self.horizon > 1:
+            x, y = np.divmod(np.asarray(cells), self.grid_size)
+            emp = self.reach.counts(x, y, sight, vacated=np.divmod(here, self.grid_size))
+            return emp.tolist() if isinstance(cells, list) else emp
+        return self.grid.candidate_empowerment(cells, sight, here)
 
     def agent_movement_phase(self):
-        random.shuffle(self.agents)
-        occupied = {(a.x,a.y) for a in self.agents if a.alive}
-
-        for agent in self.agents:
-            if not agent.alive:
-                continue
-            vis_locs = self.visible_locations(agent)
-            candidates = [(lx,ly) for (lx,ly) in vis_locs if (lx,ly) not in occupied or (lx,ly) == (agent.x,agent.y)]
-            if not candidates:
-                continue
-            
-            # If uses empowerment:
-            # Choose location to maximize: sugar(lx,ly) + alpha * empowerment(lx,ly)
-            # Let's pick alpha = 0.5 just as an example
-            # If not uses empowerment: just choose by sugar.
-
-            if agent.uses_empowerment:
-                best_score = None
-                best_candidates = []
-                for (cx,cy) in candidates:
-                    # Evaluate sugar
-                    s_val = self.sugar[cx][cy]
-                    # Evaluate empowerment at that location
-                    # Temporarily assume this location is agent's location next turn
-                    # The set of occupied must remove agent's old position and include new
-                    new_occupied = set(occupied)
-                    if (agent.x,agent.y) in new_occupied:
-                        new_occupied.remove((agent.x,agent.y))
-                    # We do not add the new spot yet because we are evaluating it
-                    emp_val = self.empowerment(cx, cy, agent.sight, new_occupied)
-                    score = s_val + 0.5 * emp_val
-                    if best_score is None or score > best_score:
-                        best_score = score
-                        best_candidates = [(cx,cy)]
-                    elif score == best_score:
-                        best_candidates.append((cx,cy))
-                new_x, new_y = random.choice(best_candidates)
-            else:
-                # normal sugar-based decision
-                best_sugar = max(self.sugar[lx][ly] for (lx,ly) in candidates)
-                best_candidates = [(lx,ly) for (lx,ly) in candidates if self.sugar[lx][ly] == best_sugar]
-                new_x, new_y = random.choice(best_candidates)
-
-            occupied.remove((agent.x, agent.y))
-            agent.x, agent.y = new_x, new_y
-            occupied.add((agent.x, agent.y))
-            # consume sugar
-            agent.energy += self.sugar[new_x][new_y]
-            self.sugar[new_x][new_y] = 0
+        if self.schedule == "synchronous":
+            synchronous_movement(self, weight=self.empowerment_weight)
+            return
+        # If uses empowerment:
+        # Choose location to maximize: sugar(lx,ly) + alpha * empowerment(lx,ly)
+        # alpha = self.empowerment_weight (0.5 by default)
+        # If not uses empowerment: just choose by sugar (see sequential.py).
+        sequential_movement(self, weight=self.empowerment_weight)
 
     def consumption_phase_and_procreation(self):
-        occupied = {(a.x,a.y) for a in self.agents if a.alive}
-        new_agents = []
-        for agent in self.agents:
-            if agent.alive:
-                agent.energy -= 1
-                if agent.energy <= 0:
-                    agent.alive = False
-                    continue
-                # Procreate if energy >20
-                if agent.energy > 20:
-                    neighbors = [(agent.x+1, agent.y),
-                                 (agent.x-1, agent.y),
-                                 (agent.x, agent.y+1),
-                                 (agent.x, agent.y-1)]
-                    neighbors = [(self.wrap(x),self.wrap(y)) for (x,y) in neighbors]
-                    empty_neighbors = [n for n in neighbors if n not in occupied]
-                    if empty_neighbors:
-                        child_x, child_y = random.choice(empty_neighbors)
-                        child_energy = agent.energy // 2
-                        agent.energy = agent.energy - child_energy
-                        child_sight = agent.sight
-                        # mutation
-                        m = random.randint(0,10)
-                        if m == 0 and child_sight > 2:
-                            child_sight -= 1
-                        elif m == 1 and child_sight < 5:
-                            child_sight += 1
-
-                        # Inherit uses_empowerment
-                        child_ue = agent.uses_empowerment
-                        child = Agent(child_x, child_y, energy=child_energy, sight=child_sight, uses_empowerment=child_ue)
-                        new_agents.append(child)
-                        occupied.add((child_x, child_y))
-
-        self.agents.extend(new_agents)
-
-    def run_simulation(self, turns=TURNS):
+        # Energy consumption, deaths and births in bulk (see procreation.py)
+        consume_and_procreate(self)
+
+    def run_simulation(self, turns=TURNS, write_csv=True, out_dir=None, snapshot_every=None,
+                       checkpoint_every=None, checkpoint_dir=CHECKPOINT_DIR, profiler=None, metrics=None, cache=None, stop=None, lineage=None):
         # Track number of agents using empowerment vs not
         # Track avg energy of both groups
-        data = []
-        for t in range(1, turns+1):
-            self.sugar_growth_phase()
-            self.agent_movement_phase()
-            self.consumption_phase_and_procreation()
-
-            living_agents = [a for a in self.agents if a.alive]
-            emp_agents = [a for a in living_agents if a.uses_empowerment]
-            non_emp_agents = [a for a in living_agents if not a.uses_empowerment]
-
-            num_emp = len(emp_agents)
-            num_non_emp = len(non_emp_agents)
-            avg_emp_energy = statistics.mean([a.energy for a in emp_agents]) if num_emp>0 else 0
-            avg_non_emp_energy = statistics.mean([a.energy for a in non_emp_agents]) if num_non_emp>0 else 0
-
-            data.append((t, len(living_agents), num_emp, num_non_emp, avg_emp_energy, avg_non_emp_energy))
-
-        with open("task4_empowerment_data.csv","w",newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Turn","TotalAgents","EmpAgents","NonEmpAgents","AvgEmpEnergy","AvgNonEmpEnergy"])
-            writer.writerows(data)
+        # metrics: extra {column: "stat:field@group"} measured each turn (telemetry and self.metrics)
+        # cache: a runcache.RunCache; a seeded run already in it is read back instead of simulated
+        # stop: detectors (or their names) that end the run early, see termination.py
+        # lineage: a lineage.Lineage or directory to log births and deaths to; such runs bypass the cache
+        # out_dir: optional streaming copy of the per-turn data plus grid snapshots.
+        # The loop itself is simulation.simulate.
+        return simulate(self, METRICS, export_csv, turns, write_csv=write_csv, out_dir=out_dir, snapshot_every=snapshot_every,
+                        checkpoint_every=checkpoint_every, checkpoint_dir=checkpoint_dir, profiler=profiler,
+                        metrics=metrics, cache=cache, stop=stop, lineage=lineage)
+
+def export_csv(data, path="task4_empowerment_data.csv"):
+    with open(path,"w",newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Turn","TotalAgents","EmpAgents","NonEmpAgents","AvgEmpEnergy","AvgNonEmpEnergy"])
+        writer.writerows(data)
 
 def plot_csv(file):
-    turns = []
-    total_agents = []
-    emp_agents = []
-    non_emp_agents = []
-    avg_emp_energy = []
-    avg_non_emp_energy = []
-
-    with open(file,"r") as f:
-        import csv
-        reader = csv.reader(f)
-        next(reader) # skip header
-        for row in reader:
-            t = int(row[0])
-            turns.append(t)
-            total_agents.append(int(row[1]))
-            emp_agents.append(int(row[2]))
-            non_emp_agents.append(int(row[3]))
-            avg_emp_energy.append(float(row[4]))
-            avg_non_emp_energy.append(float(row[5]))
+    import matplotlib.pyplot as plt # imported here so headless runs never load it
+    # CSV file or telemetry directory, loaded in one vectorized pass
+    series = load_series(file)
+    turns = series["Turn"]
+    emp_agents = series["EmpAgents"]
+    non_emp_agents = series["NonEmpAgents"]
+    avg_emp_energy = series["AvgEmpEnergy"]
+    avg_non_emp_energy = series["AvgNonEmpEnergy"]
 
     plt.figure()
     plt.plot(turns, emp_agents, label="Empowered Agents")
@@ -232,8 +161,9 @@ def plot_csv(file):
 
 
 if __name__ == "__main__":
-    s = EmpoweredSugarscape()
-    s.run_simulation()
+    # read back from the run cache if nothing changed
+    s = EmpoweredSugarscape(rng=SEED)
+    s.run_simulation(cache=RunCache())
     print("Task 4 simulation with empowerment completed. Data saved to CSV.")
     plot_csv("task4_empowerment_data.csv")
 
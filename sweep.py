@@ -0,0 +1,64 @@
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from runcache import RunCache
+from simulation import MODELS, load_model
+
+# Parameter sweeps over any of the three models on a process pool.
+# Every (parameter set, replicate) job gets its own child SeedSequence, which
+# seeds that model's own random stream (see rng.py), so a sweep is
+# reproducible whatever order the workers finish in. Results are appended to
+# one JSON-lines file as soon as each run completes.
+
+def expand_grid(param_grid):
+    # {"num_agents": [20, 40], "turns": [100]} -> list of dicts, one per combination
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+
+def run_job(model, params, seed_seq, cache_dir=None, stop=None):
+    module, cls = load_model(model)
+    columns = ["Turn", *module.METRICS]
+    params = dict(params)
+    turns = params.pop("turns", None)
+    sim = cls(rng=seed_seq, **params)
+    kwargs = {"write_csv": False, "out_dir": None}
+    if turns is not None:
+        kwargs["turns"] = turns
+    if cache_dir is not None:
+        kwargs["cache"] = RunCache(cache_dir)
+    if stop is not None:
+        kwargs["stop"] = stop
+    data = sim.run_simulation(**kwargs)
+    return {"columns": columns, "rows": [list(row) for row in data],
+            "stop_reason": sim.stop_reason, "stop_turn": sim.stop_turn}
+
+def run_sweep(model, param_grid, replicates=1, seed=0, workers=None, out="sweep_results.jsonl", cache_dir=None, stop=None):
+    # Generator: yields each run's record as it finishes (also appended to out).
+    # With cache_dir, runs already in that runcache.RunCache are read back.
+    # stop: termination detectors for every run (names or picklable objects, see termination.py)
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}, expected one of {sorted(MODELS)}")
+    jobs = [(params, r) for params in expand_grid(param_grid) for r in range(replicates)]
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out, "a") as f:
+        futures = {pool.submit(run_job, model, params, seeds[i], cache_dir, stop): i for i, (params, r) in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            params, r = jobs[i]
+            record = {"model": model, "params": params, "replicate": r,
+                      "seed": seed, "spawn_key": list(seeds[i].spawn_key)}
+            record.update(future.result())
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            yield record
+
+def load_sweep(path="sweep_results.jsonl"):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+if __name__ == "__main__":
+    grid = {"num_agents": [10, 20, 40], "procreation_threshold": [15, 20, 25], "turns": [500]}
+    for rec in run_sweep("EvolSugarscape", grid, replicates=4):
+        print(rec["params"], rec["replicate"], rec["rows"][-1])
@@ -0,0 +1,81 @@
+import numpy as np
+from grid import EMPTY
+
+# Synchronous (simultaneous-move) movement phase.
+# Every living agent scores its visible cells against the same grid state:
+# the cells free at the start of the phase plus its own cell. Agents get a
+# random priority. In each round every unresolved agent targets its best
+# remaining cell. On each target cell the highest-priority agent wins and
+# claims it. Losers re-pick among the cells nobody has claimed, for at most
+# `rounds` rounds. An agent's own cell is never contested, so leftovers
+# simply stay put. All moves and harvests are then applied in bulk.
+
+ROUNDS = 4
+
+def synchronous_movement(model, weight=0.0, rounds=ROUNDS):
+    # weight: empowerment weight for agents with uses_empowerment (0 = sugar only),
+    # scored through model.empowerment
+    grid = model.grid
+    agents = model.agents
+    n = grid.grid_size
+    living = agents.living()
+    m = len(living)
+    if m == 0:
+        return
+    px = agents.x[living].astype(np.int64)
+    py = agents.y[living].astype(np.int64)
+    sight = agents.sight[living].astype(np.int64)
+
+    max_sight = int(sight.max())
+    dx, dy = grid.stencil(max_sight)
+    cx = (px[:, None] + dx) % n
+    cy = (py[:, None] + dy) % n
+    ok = grid.stencil_radius(max_sight) <= sight[:, None]
+    ok &= grid.occupancy[cx, cy] == EMPTY
+    ok[:, 0] = True  # own cell (stencil index 0)
+    profiler = getattr(model, "profiler", None)
+    if profiler is not None:
+        profiler.count("candidates", int(ok.sum()))
+
+    score = grid.sugar_at(cx, cy).astype(np.float64)
+    if weight:
+        empowered = agents.uses_empowerment[living]
+        for s in np.unique(sight[empowered]).tolist():
+            rows = np.flatnonzero(empowered & (sight == s))
+            emp = model.empowerment(cx[rows], cy[rows], s, vacated=(px[rows, None], py[rows, None]))
+            score[rows] += weight * emp
+
+    priority = model.rng.permutation(m)
+    target = np.zeros(m, dtype=np.int64)  # column in the candidate matrix
+    unresolved = np.ones(m, dtype=bool)
+    claimed = np.zeros(n * n, dtype=bool)
+    cells = cx * n + cy
+    for _ in range(rounds):
+        rows = np.flatnonzero(unresolved)
+        if len(rows) == 0:
+            break
+        avail = ok[rows] & ~claimed[cells[rows]]
+        avail[:, 0] = True
+        s = np.where(avail, score[rows], -np.inf)
+        # best cell, ties broken by a random key
+        ties = s == s.max(axis=1, keepdims=True)
+        pick = np.argmax(np.where(ties, model.rng.random_array(ties.shape), -1.0), axis=1)
+        want = cells[rows, pick]
+        # highest priority wins each contested cell
+        order = np.lexsort((priority[rows], want))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = want[order][1:] != want[order][:-1]
+        winners = rows[order[first]]
+        target[winners] = pick[order[first]]
+        unresolved[winners] = False
+        claimed[want[order[first]]] = True
+    target[unresolved] = 0
+
+    nx = cx[np.arange(m), target]
+    ny = cy[np.arange(m), target]
+    moved = target != 0
+    grid.vacate(px[moved], py[moved])
+    grid.place(nx[moved], ny[moved], agents.id[living[moved]])
+    agents.x[living] = nx
+    agents.y[living] = ny
+    agents.energy[living] += grid.harvest(nx, ny)
@@ -0,0 +1,183 @@
+import os
+import json
+import numpy as np
+
+# Streaming run output. Per-turn metrics are buffered and appended in chunks
+# to metrics.bin (one structured record per turn). Snapshots append the sugar
+# grid to sugar.bin and living agent positions to positions.bin. index.json
+# describes the files and is rewritten on every flush, so everything up to
+# the last flush survives a crash. open_run() maps the files back as arrays.
+# meta is free-form run information kept in index.json (e.g. stop_reason).
+# A run resumed from a checkpoint (resume_turn) continues the directory it
+# wrote before: records after the checkpoint turn are cut off and new ones
+# appended, so the files hold the whole run.
+
+INDEX = "index.json"
+METRICS = "metrics.bin"
+SUGAR = "sugar.bin"
+POSITIONS = "positions.bin"
+
+class TelemetryWriter:
+    def __init__(self, out_dir, columns, snapshot_every=None, snapshot_turns=(), chunk_turns=100, resume_turn=None):
+        # columns: list of (name, dtype) for the per-turn metrics record
+        # resume_turn: the turn a resumed model continues from (model.grid.turn)
+        self.out_dir = out_dir
+        self.dtype = np.dtype([(name, dt) for name, dt in columns])
+        self.snapshot_every = snapshot_every
+        self.snapshot_turns = set(snapshot_turns)
+        self.chunk_turns = chunk_turns
+        self.rows = []
+        self.num_rows = 0
+        self.snapshots = []  # (turn, positions offset, positions count)
+        self.num_positions = 0
+        self.grid_shape = None
+        self.sugar_dtype = None
+        self.meta = {}
+        os.makedirs(out_dir, exist_ok=True)
+        if resume_turn and os.path.exists(os.path.join(out_dir, INDEX)):
+            self._resume(resume_turn)
+        else:
+            if resume_turn and any(os.scandir(out_dir)):
+                raise FileExistsError(f"{out_dir} is not empty and holds no run to resume; refusing to overwrite it")
+            for name in (METRICS, SUGAR, POSITIONS):
+                open(os.path.join(out_dir, name), "wb").close()
+        self._write_index()
+
+    def _resume(self, turn):
+        # Keep the records of turns up to `turn` and append after them
+        with open(os.path.join(self.out_dir, INDEX)) as f:
+            index = json.load(f)
+        dtype = np.dtype([tuple(c) for c in index["metrics_dtype"]])
+        if dtype != self.dtype:
+            raise ValueError(f"{self.out_dir} holds a run with other columns; refusing to overwrite it")
+        turns = np.fromfile(os.path.join(self.out_dir, METRICS), dtype=dtype, count=index["num_rows"])["Turn"]
+        keep = int(np.searchsorted(turns, turn, side="right"))
+        if keep == 0 or turns[keep-1] != turn:
+            raise ValueError(f"{self.out_dir} does not reach turn {turn}; refusing to overwrite it")
+        self.num_rows = keep
+        self.snapshots = [s for s in index["snapshots"] if s[0] <= turn]
+        self.num_positions = sum(s[2] for s in self.snapshots)
+        self.grid_shape = index["grid_shape"]
+        self.sugar_dtype = index["sugar_dtype"]
+        grid_bytes = int(np.prod(self.grid_shape)) * np.dtype(self.sugar_dtype).itemsize if self.grid_shape else 0
+        os.truncate(os.path.join(self.out_dir, METRICS), keep * dtype.itemsize)
+        os.truncate(os.path.join(self.out_dir, SUGAR), len(self.snapshots) * grid_bytes)
+        os.truncate(os.path.join(self.out_dir, POSITIONS), self.num_positions * 2 * 4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def wants_snapshot(self, turn):
+        if turn in self.snapshot_turns:
+            return True
+        return bool(self.snapshot_every) and turn % self.snapshot_every == 0
+
+    def record(self, row):
+        self.rows.append(tuple(row))
+        if len(self.rows) >= self.chunk_turns:
+            self.flush()
+
+    def snapshot(self, turn, sugar, xs, ys):
+        sugar = np.ascontiguousarray(sugar)
+        if self.grid_shape is None:
+            self.grid_shape = sugar.shape
+            self.sugar_dtype = sugar.dtype.str
+        with open(os.path.join(self.out_dir, SUGAR), "ab") as f:
+            sugar.astype(self.sugar_dtype, copy=False).tofile(f)
+        positions = np.stack([xs, ys], axis=1).astype(np.int32)
+        with open(os.path.join(self.out_dir, POSITIONS), "ab") as f:
+            positions.tofile(f)
+        self.snapshots.append((turn, self.num_positions, len(positions)))
+        self.num_positions += len(positions)
+        self.flush()
+
+    def flush(self):
+        if self.rows:
+            with open(os.path.join(self.out_dir, METRICS), "ab") as f:
+                np.array(self.rows, dtype=self.dtype).tofile(f)
+            self.num_rows += len(self.rows)
+            self.rows = []
+        self._write_index()
+
+    def close(self):
+        self.flush()
+
+    def _write_index(self):
+        index = {
+            "metrics_dtype": [(name, self.dtype[name].str) for name in self.dtype.names],
+            "num_rows": self.num_rows,
+            "grid_shape": self.grid_shape,
+            "sugar_dtype": self.sugar_dtype,
+            "snapshots": self.snapshots,
+            "meta": self.meta,
+        }
+        path = os.path.join(self.out_dir, INDEX)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+class Run:
+    # Read-only, memory-mapped view of a telemetry directory
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, INDEX)) as f:
+            index = json.load(f)
+        self.dtype = np.dtype([tuple(c) for c in index["metrics_dtype"]])
+        self.metrics = _memmap(os.path.join(out_dir, METRICS), self.dtype, (index["num_rows"],))
+        self.snapshot_turns = [s[0] for s in index["snapshots"]]
+        self._positions_at = {s[0]: (s[1], s[2]) for s in index["snapshots"]}
+        self.meta = index.get("meta", {})
+        if index["grid_shape"] is None:
+            self.sugar = np.zeros((0, 0, 0))
+            self._positions = np.zeros((0, 2), dtype=np.int32)
+        else:
+            shape = (len(self.snapshot_turns),) + tuple(index["grid_shape"])
+            self.sugar = _memmap(os.path.join(out_dir, SUGAR), np.dtype(index["sugar_dtype"]), shape)
+            total = sum(s[2] for s in index["snapshots"])
+            self._positions = _memmap(os.path.join(out_dir, POSITIONS), np.int32, (total, 2))
+
+    def column(self, name):
+        return self.metrics[name]
+
+    def sugar_at(self, turn):
+        return self.sugar[self.snapshot_turns.index(turn)]
+
+    def positions(self, turn):
+        offset, count = self._positions_at[turn]
+        return self._positions[offset:offset+count]
+
+def _memmap(path, dtype, shape):
+    if np.prod(shape) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+def open_run(out_dir):
+    return Run(out_dir)
+
+# Optional CSV export (post-processing)
+
+def write_metrics_csv(run, path):
+    names = run.dtype.names
+    fmt = ["%d" if run.dtype[n].kind in "iub" else "%r" for n in names]
+    with open(path, "w") as f:
+        f.write(",".join(names) + "\n")
+        np.savetxt(f, np.column_stack([run.metrics[n] for n in names]).astype(object), fmt=fmt, delimiter=",")
+
+def write_positions_csv(run, path):
+    with open(path, "w") as f:
+        f.write("Turn,AgentX,AgentY\n")
+        for t in run.snapshot_turns:
+            pos = run.positions(t)
+            np.savetxt(f, np.column_stack([np.full(len(pos), t), pos]), fmt="%d", delimiter=",")
+
+def write_sugar_csv(run, path):
+    with open(path, "w") as f:
+        f.write("Turn,X,Y,Sugar\n")
+        for k, t in enumerate(run.snapshot_turns):
+            sugar = run.sugar[k]
+            xs, ys = np.indices(sugar.shape)
+            rows = np.column_stack([np.full(sugar.size, t), xs.ravel(), ys.ravel(), sugar.ravel()])
+            np.savetxt(f, rows, fmt="%d", delimiter=",")
@@ -0,0 +1,94 @@
+import copy
+from collections import deque
+import numpy as np
+
+# Early termination for run_simulation(stop=[...]). Each detector looks at
+# the model after a turn and returns a reason string to stop, or None.
+# Detectors are given as objects or by name (DETECTORS). The first reason
+# ends the run; it is kept on model.stop_reason (and in the telemetry index),
+# and the remaining turns are filled in with the final turn's values.
+#
+#     model.run_simulation(stop=["extinction", "takeover", SteadyState(window=100)])
+
+class Extinction:
+    def check(self, model):
+        return "extinction" if model.agents.num_alive() == 0 else None
+
+class Takeover:
+    # One strategy (uses_empowerment or not) holds at least min_share of the
+    # population, after both have been present. Only models that mix
+    # strategies (empowerment_ratio) are checked.
+    def __init__(self, min_share=1.0):
+        self.min_share = min_share
+        self._mixed = False
+
+    def check(self, model):
+        if not hasattr(model, "empowerment_ratio"):
+            return None
+        agents = model.agents
+        living = agents.living()
+        if len(living) == 0:
+            return None
+        share = np.count_nonzero(agents.uses_empowerment[living]) / len(living)
+        if 0 < share < 1:
+            self._mixed = True
+        if not self._mixed:
+            return None
+        if share >= self.min_share:
+            return "takeover:emp"
+        if 1 - share >= self.min_share:
+            return "takeover:non_emp"
+        return None
+
+class SteadyState:
+    # Population, mean energy and mean sight each stayed within a band of
+    # tolerance (relative to the series' mean) over the last `window` turns
+    def __init__(self, window=50, tolerance=0.02):
+        self.window = window
+        self.tolerance = tolerance
+        self._history = deque(maxlen=window)
+
+    def check(self, model):
+        agents = model.agents
+        living = agents.living()
+        if len(living) == 0:
+            return None
+        self._history.append((len(living), agents.energy[living].mean(), agents.sight[living].mean()))
+        if len(self._history) < self.window:
+            return None
+        series = np.array(self._history)
+        spread = series.max(axis=0) - series.min(axis=0)
+        scale = np.maximum(np.abs(series.mean(axis=0)), 1e-12)
+        if np.all(spread <= self.tolerance * scale):
+            return f"steady_state:{self.window}"
+        return None
+
+DETECTORS = {
+    "extinction": Extinction,
+    "takeover": Takeover,
+    "steady_state": SteadyState,
+}
+
+class Stopper:
+    def __init__(self, detectors):
+        # detector objects are copied, so each run starts with fresh history
+        self.detectors = [DETECTORS[d]() if isinstance(d, str) else copy.deepcopy(d) for d in detectors]
+
+    def check(self, model):
+        for detector in self.detectors:
+            reason = detector.check(model)
+            if reason is not None:
+                return reason
+        return None
+
+def fill_remaining(model, data, row, telemetry, last_turn, turns):
+    # Repeat the final turn's values (and snapshot) for turns last_turn+1..turns
+    values = data[-1][1:]
+    living = model.agents.living()
+    for t in range(last_turn + 1, turns + 1):
+        data.append((t, *values))
+        model.metrics.record(row)
+        if telemetry is not None:
+            telemetry.record((t, *row.values()))
+            if telemetry.wants_snapshot(t):
+                telemetry.snapshot(t, model.grid.snapshot(), model.agents.x[living], model.agents.y[living])
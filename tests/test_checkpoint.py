@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pytest
+from checkpoint import checkpoint_path, load_checkpoint, fork_checkpoint
+from telemetry import open_run
+from sugarscape1 import Sugarscape
+from sugarscape2 import EvolSugarscape
+from sugarscape3 import EmpoweredSugarscape
+
+# A run resumed from a checkpoint continues exactly as the straight run
+# does, telemetry included, whatever was run after the checkpoint was saved.
+# Forks of one checkpoint repeat for one seed and differ between seeds.
+
+def state(model):
+    agents = model.agents
+    living = agents.living()
+    return [getattr(agents, f)[living].tolist() for f in ("id", "x", "y", "energy", "sight", "uses_empowerment")]
+
+MODELS = [
+    (Sugarscape, {}),
+    (EvolSugarscape, {}),
+    (EmpoweredSugarscape, {}),
+    (EmpoweredSugarscape, {"horizon": 2}),
+    (EmpoweredSugarscape, {"schedule": "synchronous"}),
+    (EmpoweredSugarscape, {"lazy_regrowth": True}),
+]
+
+@pytest.mark.parametrize("cls, params", MODELS)
+def test_resume_matches_straight_run(tmp_path, cls, params):
+    run = {"write_csv": False, "snapshot_every": 10}
+    straight = cls(rng=7, **params)
+    expected = straight.run_simulation(turns=40, out_dir=str(tmp_path / "straight"), **run)
+
+    first = cls(rng=7, **params)
+    first.run_simulation(turns=30, out_dir=str(tmp_path / "resumed"), checkpoint_every=20,
+                         checkpoint_dir=str(tmp_path / "ckpt"), **run)
+    resumed = load_checkpoint(checkpoint_path(str(tmp_path / "ckpt"), 20))
+    assert resumed.grid.turn == 20
+    data = resumed.run_simulation(turns=40, out_dir=str(tmp_path / "resumed"), **run)
+
+    assert data == expected[20:]
+    assert state(resumed) == state(straight)
+    assert (resumed.grid.snapshot() == straight.grid.snapshot()).all()
+    a, b = open_run(str(tmp_path / "straight")), open_run(str(tmp_path / "resumed"))
+    assert (a.metrics == b.metrics).all()
+    for turn in (10, 20, 30, 40):
+        assert (a.sugar_at(turn) == b.sugar_at(turn)).all()
+        assert (a.positions(turn) == b.positions(turn)).all()
+
+def test_forks_differ_and_repeat(tmp_path):
+    model = Sugarscape(rng=3)  # no births, so the grid never fills up
+    model.run_simulation(turns=10, write_csv=False, out_dir=None, checkpoint_every=10, checkpoint_dir=str(tmp_path))
+    path = checkpoint_path(str(tmp_path), 10)
+    runs = {}
+    for seed in (1, 2, 1):
+        fork = next(fork_checkpoint(path, [seed]))
+        fork.run_simulation(turns=30, write_csv=False, out_dir=None)
+        runs.setdefault(seed, []).append(state(fork))
+    assert runs[1][0] == runs[1][1]
+    assert runs[1][0] != runs[2][0]
+    assert sorted(os.listdir(tmp_path)) == ["turn_0000010.ckpt"]
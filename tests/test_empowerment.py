@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from grid import SugarGrid, EMPTY
+from sugarscape1 import Sugarscape
+from sugarscape2 import EvolSugarscape
+from sugarscape3 import EmpoweredSugarscape
+
+# One-step empowerment from the tracked row/column free counts against the
+# original set-based count, and the grid's occupancy and free counts
+# against the agents after every phase.
+
+def cross(x, y, sight, n):
+    cells = {(x, y)}
+    for i in range(1, sight+1):
+        cells |= {((x+i) % n, y), ((x-i) % n, y), (x, (y+i) % n), (x, (y-i) % n)}
+    return cells
+
+def set_count(occupied, x, y, sight, n, vacated=None):
+    # distinct free cells of the cross, (x, y) and vacated counting as free
+    return sum(1 for c in cross(x, y, sight, n) if c not in occupied or c == (x, y) or c == vacated)
+
+def random_grid(n, sights, density, seed):
+    rng = np.random.default_rng(seed)
+    grid = SugarGrid(n, track_sights=sights)
+    cells = rng.choice(n * n, int(density * n * n), replace=False)
+    x, y = np.divmod(cells, n)
+    grid.place(x, y, np.arange(len(cells)))
+    return grid, set(zip(x.tolist(), y.tolist()))
+
+@pytest.mark.parametrize("n", [4, 7, 25])
+@pytest.mark.parametrize("density", [0.1, 0.5, 0.9])
+def test_grid_empowerment_matches_set_count(n, density):
+    grid, occupied = random_grid(n, range(1, 5), density, seed=n)
+    x, y = np.divmod(np.arange(n * n), n)
+    for sight in range(1, 7):  # 5 and 6 are not tracked
+        emp = grid.empowerment(x, y, sight)
+        expected = [set_count(occupied, a, b, sight, n) for a, b in zip(x.tolist(), y.tolist())]
+        assert emp.tolist() == expected
+
+@pytest.mark.parametrize("n", [4, 7, 25])
+def test_candidate_empowerment_matches_set_count(n):
+    grid, occupied = random_grid(n, range(1, 5), 0.4, seed=n + 1)
+    for here in sorted(occupied)[:20]:
+        for sight in range(1, 7):
+            grid.begin_moves()
+            cells, _ = grid.candidates(*here, sight)
+            emp = grid.candidate_empowerment(cells, sight, here[0] * n + here[1])
+            grid.end_moves()
+            expected = [set_count(occupied, *divmod(c, n), sight, n, vacated=here) for c in cells]
+            assert emp == expected
+            assert grid.candidate_empowerment(np.array(cells), sight, here[0] * n + here[1]).tolist() == expected
+            x, y = np.divmod(np.array(cells), n)
+            assert grid.empowerment(x, y, sight, vacated=here).tolist() == expected
+
+def check_grid(model):
+    grid, agents = model.grid, model.agents
+    living = agents.living()
+    occupancy = np.full_like(grid.occupancy, EMPTY)
+    occupancy[agents.x[living], agents.y[living]] = agents.id[living]
+    assert (occupancy == grid.occupancy).all()
+    if grid.sight_slot:
+        fresh = SugarGrid(grid.grid_size, track_sights=list(grid.sight_slot))
+        fresh.place(agents.x[living], agents.y[living], agents.id[living])
+        assert (fresh.row_free == grid.row_free).all()
+        assert (fresh.col_free == grid.col_free).all()
+
+@pytest.mark.parametrize("cls, params", [
+    (Sugarscape, {}),
+    (Sugarscape, {"grid_size": 200, "num_agents": 1500}),
+    (EvolSugarscape, {}),
+    (EmpoweredSugarscape, {}),
+    (EmpoweredSugarscape, {"horizon": 2}),
+    (EmpoweredSugarscape, {"grid_size": 7}),
+    (EmpoweredSugarscape, {"schedule": "synchronous"}),
+])
+def test_grid_tracks_agents_after_every_phase(cls, params):
+    model = cls(rng=3, **params)
+    consumption = getattr(model, "consumption_phase_and_procreation", None) or model.consumption_phase
+    check_grid(model)
+    for t in range(1, 16):
+        for phase in (model.sugar_growth_phase, model.agent_movement_phase, consumption):
+            phase()
+            check_grid(model)
+        model.agents.maybe_compact(t)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from grid import SugarGrid
+from empowerment import Reach
+
+# Multi-step empowerment (Reach) against a breadth-first search over the
+# free cells of the torus.
+
+def bfs_count(occupied, x, y, sight, horizon, n, vacated=None):
+    reached = {(x, y)}
+    frontier = [(x, y)]
+    for _ in range(horizon):
+        step = []
+        for cx, cy in frontier:
+            for i in range(1, sight+1):
+                for c in (((cx+i) % n, cy), ((cx-i) % n, cy), (cx, (cy+i) % n), (cx, (cy-i) % n)):
+                    if c not in reached and (c not in occupied or c == vacated):
+                        reached.add(c)
+                        step.append(c)
+        frontier = step
+    return len(reached)
+
+@pytest.mark.parametrize("n", [5, 9, 30])
+@pytest.mark.parametrize("horizon", [1, 2, 3])
+def test_reach_matches_bfs(n, horizon):
+    rng = np.random.default_rng(n * 10 + horizon)
+    grid = SugarGrid(n)
+    cells = rng.choice(n * n, n * n // 2, replace=False)
+    ox, oy = np.divmod(cells, n)
+    grid.place(ox, oy, np.arange(len(cells)))
+    occupied = set(zip(ox.tolist(), oy.tolist()))
+    reach = Reach(grid, horizon)
+    x, y = np.divmod(rng.choice(n * n, 40), n)
+    movers = rng.integers(len(cells), size=40)
+    vx, vy = ox[movers], oy[movers]
+    for sight in (1, 2, 4):
+        counts = reach.counts(x, y, sight, vacated=(vx, vy))
+        expected = [bfs_count(occupied, a, b, sight, horizon, n, vacated=(c, d))
+                    for a, b, c, d in zip(x.tolist(), y.tolist(), vx.tolist(), vy.tolist())]
+        assert counts.tolist() == expected
+
+def test_reach_reads_live_occupancy():
+    grid = SugarGrid(12)
+    reach = Reach(grid, 2)
+    before = reach.counts(np.array([3]), np.array([3]), 2)
+    grid.place(np.array([3, 4]), np.array([4, 3]), np.array([0, 1]))
+    after = reach.counts(np.array([3]), np.array([3]), 2)
+    assert after[0] < before[0]
+
+def test_horizon_one_matches_grid_empowerment():
+    n = 15
+    rng = np.random.default_rng(1)
+    grid = SugarGrid(n, track_sights=range(1, 4))
+    cells = rng.choice(n * n, 100, replace=False)
+    ox, oy = np.divmod(cells, n)
+    grid.place(ox, oy, np.arange(len(cells)))
+    x, y = np.divmod(np.arange(n * n), n)
+    vacated = (ox[0], oy[0])
+    for sight in range(1, 4):
+        assert (Reach(grid, 1).counts(x, y, sight, vacated) == grid.empowerment(x, y, sight, vacated)).all()
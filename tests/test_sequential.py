@@ -0,0 +1,34 @@
+import pytest
+import sequential
+from sugarscape1 import Sugarscape
+from sugarscape2 import EvolSugarscape
+from sugarscape3 import EmpoweredSugarscape
+
+# Batched sequential moves (runs of movers that can't see each other) give
+# exactly the result of moving every agent one by one.
+
+def state(model):
+    agents = model.agents
+    living = agents.living()
+    return [getattr(agents, f)[living].tolist() for f in ("id", "x", "y", "energy")]
+
+@pytest.mark.parametrize("cls, params, turns", [
+    (Sugarscape, {"grid_size": 200, "num_agents": 1500}, 20),
+    (EvolSugarscape, {"grid_size": 420, "num_agents": 3000}, 4),
+    (EmpoweredSugarscape, {"grid_size": 640, "num_agents": 5000}, 2),
+])
+def test_batched_moves_match_one_by_one(monkeypatch, cls, params, turns):
+    batches = []
+    move_batch = sequential.move_batch
+    monkeypatch.setattr(sequential, "move_batch", lambda *args: batches.append(1) or move_batch(*args))
+    batch_min = sequential.BATCH_MIN
+    batched = cls(rng=2, **params)
+    one_by_one = cls(rng=2, **params)
+    for t in range(1, turns+1):
+        monkeypatch.setattr(sequential, "BATCH_MIN", batch_min)
+        batched.run_simulation(turns=t, write_csv=False, out_dir=None)
+        monkeypatch.setattr(sequential, "BATCH_MIN", 1 << 30)
+        one_by_one.run_simulation(turns=t, write_csv=False, out_dir=None)
+        assert state(batched) == state(one_by_one)
+        assert (batched.grid.snapshot() == one_by_one.grid.snapshot()).all()
+    assert batches